@@ -6,44 +6,659 @@ Version: 1.0
 Description: Compute statistics for a given dataset.
 """
 
+import argparse
+import csv
+import functools
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import operator
+import os
+import random
+import stat
 import sys
+import tempfile
 import time
 
-def read_data(file_path):
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+
+class RunningStats:
+    """
+    Streaming accumulator for the count, mean, variance, minimum and maximum
+    of a dataset.
+
+    Values are folded in one at a time with Welford's update, so the moments
+    come out of a single pass with O(1) memory. Partial accumulators built
+    over different parts of the data can be combined with ``merge``.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def fresh(self):
+        """
+        Return an empty accumulator to collect a partial result into.
+
+        Returns:
+        RunningStats: An empty accumulator.
+        """
+        return RunningStats()
+
+    def update(self, value):
+        """
+        Add a single value to the accumulator.
+
+        Parameters:
+        value (float): The value to add.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def update_many(self, values):
+        """
+        Add a block of values: the block's own moments are computed with two
+        fast passes over it and then merged in.
+
+        Parameters:
+        values (array): The values to add.
+        """
+        count = len(values)
+        if count == 0:
+            return
+        block = self.fresh()
+        block.count = count
+        block.mean = sum(values) / count
+        block.m2 = sum((x - block.mean) ** 2 for x in values)
+        block.minimum = min(values)
+        block.maximum = max(values)
+        self.merge(block)
+
+    def merge(self, other):
+        """
+        Combine the moments of another accumulator into this one
+        (Chan et al. pairwise formula).
+
+        Parameters:
+        other (RunningStats): The accumulator to merge in.
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count = other.count
+            self.mean = other.mean
+            self.m2 = other.m2
+            self.minimum = other.minimum
+            self.maximum = other.maximum
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def variance(self):
+        """
+        Sample variance (n - 1) of the values seen so far.
+
+        Returns:
+        float: The variance, or NaN with fewer than two values.
+        """
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    def standard_deviation(self):
+        """
+        Population standard deviation (n) of the values seen so far.
+
+        Returns:
+        float: The standard deviation, or NaN if no values were seen.
+        """
+        if self.count == 0:
+            return math.nan
+        # STDEVP function in Excel uses n instead of n - 1
+        return (self.m2 / self.count) ** 0.5
+
+    def to_dict(self):
+        """
+        Serializable representation of the accumulator.
+
+        Returns:
+        dict: The accumulator state.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild an accumulator from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The accumulator state.
+
+        Returns:
+        RunningStats: The restored accumulator.
+        """
+        stats = cls()
+        stats.count = state["count"]
+        stats.mean = state["mean"]
+        stats.m2 = state["m2"]
+        stats.minimum = state["min"]
+        stats.maximum = state["max"]
+        return stats
+
+
+class FrequencyTable:
+    """
+    Streaming frequency table of the values, kept in order of first
+    appearance so ties resolve the same way however the data was split.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def fresh(self):
+        """
+        Return an empty table to collect a partial result into.
+
+        Returns:
+        FrequencyTable: An empty table.
+        """
+        return FrequencyTable()
+
+    def update_many(self, values):
+        """
+        Count a block of values.
+
+        Parameters:
+        values (array): The values to count.
+        """
+        self.counts.update(values)
+
+    def merge(self, other):
+        """
+        Add the counts of another table to this one.
+
+        Parameters:
+        other (FrequencyTable): The table to merge in.
+        """
+        self.counts.update(other.counts)
+
+    def mode(self):
+        """
+        The mode of the values counted so far, see ``mode``.
+
+        Returns:
+        The first mode encountered, or None if no value repeats.
+        """
+        return _mode_from_counts(self.counts)
+
+    def modes(self):
+        """
+        The highest frequency and every value that reaches it, see ``modes``.
+
+        Returns:
+        tuple: (count, list of tied values in order of first appearance).
+        """
+        return _modes_from_counts(self.counts)
+
+    def top(self, k):
+        """
+        The k most frequent values, see ``top_k``.
+
+        Parameters:
+        k (int): Number of values to report.
+
+        Returns:
+        list: (value, count) pairs, most frequent first.
+        """
+        return _top_from_counts(self.counts, k)
+
+    def quantiles(self, percents):
+        """
+        Exact percentiles of the values counted so far, with the same
+        interpolation as ``percentiles``. Only the distinct values are sorted.
+
+        Parameters:
+        percents (list): Percentiles to compute, each between 0 and 100.
+
+        Returns:
+        list: The percentile values, in the same order as ``percents``.
+        """
+        total = sum(self.counts.values())
+        positions = [percent / 100 * (total - 1) for percent in percents]
+        values = self._select_ranks([math.floor(p) for p in positions] + [math.ceil(p) for p in positions])
+
+        results = []
+        for position in positions:
+            lower = math.floor(position)
+            value = values[lower]
+            if position != lower:
+                value += (values[lower + 1] - value) * (position - lower)
+            results.append(value)
+        return results
+
+    def median(self):
+        """
+        Exact median of the values counted so far.
+
+        Returns:
+        float: The median value.
+        """
+        total = sum(self.counts.values())
+        middle = total // 2
+        if total % 2 == 0:
+            values = self._select_ranks([middle - 1, middle])
+            return (values[middle - 1] + values[middle]) / 2
+        return self._select_ranks([middle])[middle]
+
+    def _select_ranks(self, ranks):
+        """
+        Values at several ranks (0-based, ascending) of the counted data.
+        """
+        values = {}
+        cumulative = 0
+        ranks_iter = iter(sorted(set(ranks)))
+        rank = next(ranks_iter, None)
+        for value, count in sorted(self.counts.items()):
+            cumulative += count
+            while rank is not None and rank < cumulative:
+                values[rank] = value
+                rank = next(ranks_iter, None)
+            if rank is None:
+                break
+        return values
+
+    def to_dict(self):
+        """
+        Serializable representation of the table.
+
+        Returns:
+        dict: The values and their counts, in order of first appearance.
+        """
+        return {"values": list(self.counts), "counts": list(self.counts.values())}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a table from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The table state.
+
+        Returns:
+        FrequencyTable: The restored table.
+        """
+        table = cls()
+        table.counts = Counter(dict(zip(state["values"], state["counts"])))
+        return table
+
+
+BLOCK_SIZE = 1 << 22
+
+
+def _budget_block_size(memory_budget):
+    """
+    Bytes per parsed block under a memory budget. A block of text takes
+    some 20-30 times its size while it is split, parsed and counted, so it
+    gets 1/32 of the budget, between 64 KiB and ``BLOCK_SIZE``.
+    """
+    return min(BLOCK_SIZE, max(1 << 16, memory_budget // 32))
+
+
+def _parse_block(block):
+    """
+    Parse a block of newline separated numbers.
+
+    The whole block is converted in one go; only if that fails (blank or
+    invalid lines) is it walked line by line to skip blanks and collect the
+    bad lines, so clean data never pays for the diagnostics.
+
+    Args:
+        block (bytes): Complete lines, the last one optionally unterminated.
+
+    Returns:
+        tuple: (array of values, number of non-blank lines, list of
+        (line index, text) for the lines that are not numbers).
+    """
+    lines = block.split(b"\n")
+    if not lines[-1]:
+        lines.pop()
+    try:
+        return array("d", map(float, lines)), len(lines), []
+    except ValueError:
+        pass
+
+    values = array("d")
+    errors = []
+    lines_read = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            values.append(float(line))
+        except ValueError:
+            errors.append((lines_read, line.decode("utf-8", "replace")))
+        lines_read += 1
+    return values, lines_read, errors
+
+
+def _block_ranges(view, start, stop, block_size=BLOCK_SIZE):
+    """
+    Split part of a memory-mapped file into byte ranges that end on a newline.
+
+    Args:
+        view (mmap.mmap): The mapped file.
+        start (int): First byte to split, at the start of a line.
+        stop (int): One past the last byte to split.
+        block_size (int): Minimum bytes per range.
+
+    Returns:
+        list: (start, end) byte offsets.
+    """
+    ranges = []
+    while start < stop:
+        newline = view.find(b"\n", min(start + block_size, stop) - 1, stop)
+        end = stop if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _scan_block(file_path, start, end, prototypes, keep_values):
+    """
+    Parse one byte range of a file into fresh partial sinks. Runs in the
+    worker processes of ``read_data``.
+
+    Args:
+        file_path (str): The path to the file.
+        start (int): First byte of the range.
+        end (int): One past the last byte of the range.
+        prototypes (list): Empty sinks, one partial result is built per sink.
+        keep_values (bool): Return the parsed values too.
+
+    Returns:
+        tuple: (values, number of lines, errors, partial sinks).
+    """
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            values, lines, errors = _parse_block(view[start:end])
+    parts = []
+    for prototype in prototypes:
+        part = prototype.fresh()
+        part.update_many(values)
+        parts.append(part)
+    return values if keep_values else array("d"), lines, errors, parts
+
+
+def _ordered_map(executor, function, *iterables, window):
+    """
+    Like ``executor.map``, but with at most ``window`` calls in flight, so
+    finished results do not pile up faster than they are consumed.
+    """
+    pending = deque()
+    for args in zip(*iterables):
+        pending.append(executor.submit(function, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _read_parallel(file_path, ranges, sinks, keep_values, workers):
     """
-    Read data from a file and return a list of values.
+    Parse the byte ranges of a file in a process pool. At most two ranges
+    per worker are in flight, so parsed blocks do not pile up in memory
+    faster than they are merged.
 
     Args:
         file_path (str): The path to the file.
+        ranges (list): (start, end) byte ranges.
+        sinks (iterable): The sinks to build partial results for.
+        keep_values (bool): Return the parsed values too.
+        workers (int): Number of worker processes.
+
+    Yields:
+        tuple: (values, number of lines, errors, partial sinks), in file order.
+    """
+    prototypes = [sink.fresh() for sink in sinks]
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from _ordered_map(
+            executor, _scan_block, repeat(file_path), starts, ends, repeat(prototypes), repeat(keep_values),
+            window=2 * workers,
+        )
+
+
+def _stream_blocks(file, block_size=BLOCK_SIZE):
+    """
+    Split a file that cannot be memory-mapped (a pipe, FIFO or terminal) into
+    blocks of complete lines with buffered reads.
+
+    Args:
+        file (io.BufferedReader): The open file.
+        block_size (int): Bytes per read.
+
+    Yields:
+        bytes: Complete lines, the last block optionally unterminated.
+    """
+    tail = b""
+    while True:
+        chunk = file.read(block_size)
+        if not chunk:
+            break
+        newline = chunk.rfind(b"\n")
+        if newline == -1:
+            tail += chunk
+            continue
+        yield tail + chunk[:newline + 1]
+        tail = chunk[newline + 1:]
+    if tail:
+        yield tail
+
+
+def _file_blocks(file, file_path, sinks, keep_values, workers, start, stop, block_size):
+    """
+    Parse the blocks of an open file for ``read_data``.
+
+    Regular files are memory-mapped and split into byte ranges, parsed in a
+    process pool with more than one worker. Anything else is read front to
+    back with ``_stream_blocks``; ``start``, ``stop`` and ``workers`` only
+    apply to regular files.
+
+    Yields:
+        tuple: (values, number of lines, errors, partial sinks or None), in
+        file order.
+    """
+    info = os.fstat(file.fileno())
+    if not stat.S_ISREG(info.st_mode):
+        for block in _stream_blocks(file, block_size):
+            yield (*_parse_block(block), None)
+        return
+
+    stop = info.st_size if stop is None else min(stop, info.st_size)
+    if start >= stop:
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        ranges = _block_ranges(view, start, stop, block_size)
+        if workers > 1 and len(ranges) > 1:
+            yield from _read_parallel(file_path, ranges, sinks, keep_values, workers)
+        else:
+            for block_start, block_end in ranges:
+                yield (*_parse_block(view[block_start:block_end]), None)
+
+
+def read_data(file_path, sinks=(), keep_values=True, verbose=True, workers=1, start=0, stop=None,
+              lines_before=0, block_size=BLOCK_SIZE):
+    """
+    Read data from a file and return a compact ``array('d')`` of values.
+
+    The file is memory-mapped and parsed in newline-aligned blocks of bytes;
+    pipes and other files that cannot be mapped are read in buffered blocks
+    instead, front to back and in a single process.
+    Every parsed block is also passed to the ``update_many`` method of each
+    sink, so streaming accumulators see the data as it is read.
+
+    With more than one worker the blocks are parsed in a process pool; each
+    worker fills ``fresh()`` copies of the sinks and the partial results are
+    merged back in file order. Every sink's ``update_many`` is equivalent to
+    filling a fresh partial and merging it, so the results, line counts and
+    error line numbers are the same as in the serial path.
+
+    Args:
+        file_path (str): The path to the file.
+        sinks (iterable): Accumulators with an ``update_many(values)`` method,
+            and ``fresh()`` and ``merge(other)`` when workers > 1.
+        keep_values (bool): Store the values; when False only the sinks see
+            them and the returned array is empty.
+        verbose (bool): Print an error for every line that is not a number.
+        workers (int): Number of worker processes.
+        start (int): Byte offset to start reading at, the start of a line.
+        stop (int): Byte offset to stop reading at, defaults to the end.
+        lines_before (int): Lines before ``start``, for error line numbers.
+        block_size (int): Minimum bytes per parsed block.
 
     Returns:
-        tuple: A tuple containing the list of values and the number of lines read.
+        tuple: A tuple containing the array of values and the number of lines read.
 
     Raises:
         FileNotFoundError: If the file does not exist.
     """
 
-    data = []
+    data = array("d")
     lines_read = 0
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
+        with open(file_path, "rb") as file:
+            blocks = _file_blocks(file, file_path, sinks, keep_values, workers, start, stop, block_size)
+            for values, lines, errors, parts in blocks:
+                if verbose:
+                    for index, text in errors:
+                        print(f"Error in line {lines_before+lines_read+index+1}: {text} is not a number.")
+                if keep_values:
+                    data.extend(values)
+                if parts is None:
+                    for sink in sinks:
+                        sink.update_many(values)
+                else:
+                    for sink, part in zip(sinks, parts):
+                        sink.merge(part)
+                lines_read += lines
 
-                if not line.strip():
-                    continue
+    except FileNotFoundError:
+        print("Error: File does not exist.")
+        sys.exit(1)
+    return data, lines_read
 
-                try:
-                    value = float(line.strip())
-                    data.append(value)
-                except ValueError:
-                    print(f"Error in line {lines_read+1}: {line.strip()} is not a number.")
 
-                lines_read += 1
+def _column_index(header, column):
+    """
+    Position of a selected column: its name in the header, or a 1-based
+    column number.
+    """
+    if column in header:
+        return header.index(column)
+    if column.isdigit() and 0 < int(column) <= len(header):
+        return int(column) - 1
+    print(f"Error: Column {column} does not exist.")
+    sys.exit(1)
+
+
+def read_columns(file_path, columns, group_by=None, delimiter=","):
+    """
+    Read selected numeric columns of a CSV/TSV file in a single scan.
+
+    Each series (a column, or a column within one group key) is stored in a
+    compact ``array('d')``. Empty cells are skipped; cells that are not
+    numbers are reported like bad lines in ``read_data``.
+
+    Args:
+        file_path (str): The path to the file, with a header row.
+        columns (list): Column names (or 1-based numbers) to read.
+        group_by (str): Optional column whose value splits every column into
+            one series per key.
+        delimiter (str): The field separator.
+
+    Returns:
+        tuple: A dict of series label to array of values, in order of first
+        appearance, and the number of data rows read.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    series = {}
+    rows_read = 0
+    try:
+        with open(file_path, "r", encoding="utf-8", newline="") as file:
+            reader = csv.reader(file, delimiter=delimiter)
+            header = next(reader, [])
+            indices = [_column_index(header, column) for column in columns]
+            columns = [header[index] for index in indices]
+            group_index = _column_index(header, group_by) if group_by else None
+            if group_index is not None:
+                group_by = header[group_index]
+            else:
+                targets = [series.setdefault(column, array("d")) for column in columns]
+
+            for row in reader:
+                if not row:
+                    continue
+                rows_read += 1
+                if group_index is not None:
+                    key = row[group_index] if group_index < len(row) else ""
+                    targets = [
+                        series.setdefault(f"{column} [{group_by}={key}]", array("d")) for column in columns
+                    ]
+                for column, index, target in zip(columns, indices, targets):
+                    if index >= len(row) or not row[index].strip():
+                        continue
+                    try:
+                        target.append(float(row[index]))
+                    except ValueError:
+                        print(f"Error in line {reader.line_num}: {column} {row[index].strip()} is not a number.")
 
     except FileNotFoundError:
         print("Error: File does not exist.")
         sys.exit(1)
-    return data, lines_read
+    return series, rows_read
+
+
+def _is_ndarray(data):
+    """
+    True if data is a NumPy array, so the vectorized backend can be used.
+    """
+    return np is not None and isinstance(data, np.ndarray)
 
 
 def mean(data):
@@ -51,137 +666,2057 @@ def mean(data):
     Calculate the mean of a list of numbers.
 
     Parameters:
-    data (list): A list of numbers.
+    data (list): A list of numbers, or a NumPy array.
 
     Returns:
     float: The mean of the numbers.
     """
+    if _is_ndarray(data):
+        return float(data.mean())
     return sum(data) / len(data)
 
-def median(data):
+def _partition(data, lo, hi, pivot):
     """
-    Calculate the median value of a given list of data.
+    Three-way partition of data[lo:hi + 1] in place around a pivot value.
 
     Parameters:
-    data (list): A list of numeric values.
+    data (list): A mutable sequence of numeric values.
+    lo (int): First index of the range.
+    hi (int): Last index of the range.
+    pivot (float): The pivot value.
 
     Returns:
-    float: The median value of the data.
+    tuple: (lt, gt) such that data[lo:lt] < pivot, data[lt:gt + 1] == pivot
+    and data[gt + 1:hi + 1] > pivot.
     """
-    sorted_data = sorted(data)
-    n = len(sorted_data)
-    middle = n // 2
-    if n % 2 == 0:
-        median_value = (sorted_data[middle - 1] + sorted_data[middle]) / 2
-    else:
-        median_value = sorted_data[middle]
-    return median_value
+    lt = lo
+    i = lo
+    gt = hi
+    while i <= gt:
+        value = data[i]
+        if value < pivot:
+            data[lt], data[i] = value, data[lt]
+            lt += 1
+            i += 1
+        elif value > pivot:
+            data[gt], data[i] = value, data[gt]
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
 
-def mode(data):
+
+def _select(data, k, lo=0, hi=None):
     """
-    Calculates the mode of a given list of data.
+    Introselect: rearrange data[lo:hi + 1] in place so that data[k] holds the
+    value it would have if the range were sorted, smaller values before it
+    and larger values after it.
+
+    Pivots are the median of three samples; if the partitions keep coming
+    out unbalanced the pivot switches to a random element, which keeps the
+    expected running time linear on adversarial inputs.
 
     Parameters:
-    data (list): The list of data for which the mode needs to be calculated.
+    data (list): A mutable sequence of numeric values.
+    k (int): The index to select, lo <= k <= hi.
+    lo (int): First index of the range.
+    hi (int): Last index of the range, defaults to the end of the data.
 
     Returns:
-    The mode value of the given data. If there is more than one mode,
-    it returns the first mode encountered.
-
-    If all values in the data are the same, it returns None.
+    float: The k-th smallest value.
     """
-    frequecy = {}
-    for i in data:
-        if i in frequecy:
-            frequecy[i] += 1
+    if hi is None:
+        hi = len(data) - 1
+    depth = 2 * (hi - lo + 1).bit_length()
+    while hi > lo:
+        if depth > 0:
+            first, middle, last = data[lo], data[(lo + hi) // 2], data[hi]
+            pivot = max(min(first, middle), min(max(first, middle), last))
+            depth -= 1
         else:
-            frequecy[i] = 1
+            pivot = data[random.randint(lo, hi)]
+        lt, gt = _partition(data, lo, hi, pivot)
+        if k < lt:
+            hi = lt - 1
+        elif k > gt:
+            lo = gt + 1
+        else:
+            break
+    return data[k]
 
-    max_frequecy = max(frequecy.values())
-    mode_value = [k for k, v in frequecy.items() if v == max_frequecy]
 
-    if len(mode_value) == len(data):
-        return None
+SAMPLE_THRESHOLD = 1 << 12
 
-    return mode_value[0]
 
+def _bracket_select(data, first_rank, last_rank):
+    """
+    Floyd-Rivest style selection of two close ranks without moving the data.
+
+    A random sample picks two pivots that bracket the wanted ranks with high
+    probability. One counting pass and one filtering pass (both run in C
+    through ``map``/``filter``) then leave only the few values between the
+    pivots, which are sorted to read the ranks off.
 
-def variance(data, mean_value):
+    Parameters:
+    data (list): A sequence of numeric values.
+    first_rank (int): The lower rank to select.
+    last_rank (int): The upper rank to select, >= first_rank.
+
+    Returns:
+    tuple: The values at both ranks, or None if the pivots missed them.
     """
-    Calculate the variance of a given list of data.
+    n = len(data)
+    sample_size = int(n ** (2 / 3))
+    sample = sorted(random.sample(data, sample_size))
+    margin = 3 * sample_size ** 0.5
+    lo_index = math.floor(first_rank * sample_size / n - margin)
+    hi_index = math.ceil(last_rank * sample_size / n + margin)
+
+    candidates = data
+    below = 0
+    if lo_index > 0:
+        lo_pivot = sample[lo_index]
+        below = sum(map(functools.partial(operator.gt, lo_pivot), data))
+        candidates = filter(functools.partial(operator.le, lo_pivot), candidates)
+    if hi_index < sample_size:
+        candidates = filter(functools.partial(operator.ge, sample[hi_index]), candidates)
+    candidates = sorted(candidates)
+
+    if not below <= first_rank <= last_rank < below + len(candidates):
+        return None
+    return candidates[first_rank - below], candidates[last_rank - below]
+
+
+def _select_ranks(data, ranks):
+    """
+    Find the values at several ranks (0-based, ascending) of the data.
+
+    Large inputs go through ``_bracket_select`` one pair of neighbouring
+    ranks at a time; small inputs, and the rare case where the sampled
+    pivots miss, fall back to an introselect sweep over a compact
+    ``array('d')`` copy, so the caller's data is never reordered.
 
     Parameters:
     data (list): A list of numeric values.
+    ranks (list): The ranks to select.
 
     Returns:
-    float: The variance of the data.
+    dict: Value for every requested rank.
     """
-    return sum((x - mean_value) ** 2 for x in data) / (len(data) - 1)
+    ranks = sorted(set(ranks))
+    values = {}
+    if len(data) > SAMPLE_THRESHOLD:
+        for rank in ranks:
+            if rank in values:
+                continue
+            pair = _bracket_select(data, rank, min(rank + 1, len(data) - 1))
+            if pair is not None:
+                values[rank] = pair[0]
+                values[rank + 1] = pair[1]
+        missing = [rank for rank in ranks if rank not in values]
+    else:
+        missing = ranks
 
-def standard_deviation(data, mean_value):
+    if missing:
+        data = array("d", data)
+        lo = 0
+        for rank in missing:
+            values[rank] = _select(data, rank, lo)
+            lo = rank + 1
+    return values
+
+
+def median(data):
     """
-    Calculate the standard deviation of a given list of data.
+    Calculate the median value of a given list of data.
+
+    The median is found by selection in expected linear time instead of
+    sorting, and no sorted copy of the data is made. The data is not
+    modified.
 
     Parameters:
-    data (list): A list of numeric values.
+    data (list): A list of numeric values, or a NumPy array.
 
     Returns:
-    float: The standard deviation of the data.
+    float: The median value of the data.
     """
-    # STDEVP function in Excel uses n instead of n - 1
-    _variance = sum((x - mean_value) ** 2 for x in data) / len(data)
-    return _variance ** 0.5
+    n = len(data)
+    middle = n // 2
+    if _is_ndarray(data):
+        return _np_median(data)
+    if n % 2 == 0:
+        values = _select_ranks(data, [middle - 1, middle])
+        median_value = (values[middle - 1] + values[middle]) / 2
+    else:
+        median_value = _select_ranks(data, [middle])[middle]
+    return median_value
 
-def main():
+
+def percentiles(data, percents):
     """
-    Compute statistics for a given dataset.
+    Calculate several percentiles of a given list of data.
+
+    Uses linear interpolation between the closest ranks, like Excel's
+    PERCENTILE.INC. The ranks are found by selection in expected linear time
+    instead of sorting; the data is not modified.
+
+    Parameters:
+    data (list): A list of numeric values, or a NumPy array.
+    percents (list): Percentiles to compute, each between 0 and 100.
+
+    Returns:
+    list: The percentile values, in the same order as ``percents``.
+    """
+    n = len(data)
+    if n == 0:
+        raise ValueError("percentiles requires at least one value")
+    if _is_ndarray(data):
+        # NumPy's default "linear" method is the same interpolation
+        return [float(value) for value in np.percentile(data, percents)]
+
+    positions = []
+    for percent in percents:
+        if not 0 <= percent <= 100:
+            raise ValueError(f"percentile {percent} is not between 0 and 100")
+        positions.append(percent / 100 * (n - 1))
+
+    values = _select_ranks(data, [math.floor(p) for p in positions] + [math.ceil(p) for p in positions])
+
+    results = []
+    for position in positions:
+        lower = math.floor(position)
+        fraction = position - lower
+        value = values[lower]
+        if fraction and values[lower + 1] != value:
+            value += (values[lower + 1] - value) * fraction
+        results.append(value)
+    return results
+
+
+class _RangePass:
+    """
+    One pass of the out-of-core selection: keeps the values between ``lo``
+    and ``hi`` (the extremes of the bucket chosen by the previous pass, so
+    exactly the values of that bucket) and either collects them in memory or
+    histograms them, tracking the extremes of every bucket and optionally
+    spilling the values to a temp file. Both bounds are finite, so
+    infinities are never bucketed.
+    """
+
+    SPILL_CHUNK = 1 << 16
+
+    def __init__(self, lo, hi, buckets, collect, spill):
+        self.lo = lo
+        self.hi = hi
+        self.width = (hi - lo) / buckets or (hi - lo)
+        self.buckets = buckets
+        self.values = array("d") if collect else None
+        self.histogram = [0] * buckets
+        self.bucket_min = [math.inf] * buckets
+        self.bucket_max = [-math.inf] * buckets
+        self.spill = spill
+        self.pending = array("d")
+
+    @staticmethod
+    def bucket(value, lo, width, buckets):
+        """
+        Index of the histogram bucket a value falls in.
+        """
+        index = int((value - lo) / width)
+        return min(max(index, 0), buckets - 1)
 
-    Usage: python compute_statistics.py <file_path>
+    def update(self, value):
+        """
+        Feed a single value to the pass.
+        """
+        if not self.lo <= value <= self.hi:
+            return
+
+        if self.values is not None:
+            self.values.append(value)
+            return
+
+        index = self.bucket(value, self.lo, self.width, self.buckets)
+        self.histogram[index] += 1
+        if value < self.bucket_min[index]:
+            self.bucket_min[index] = value
+        if value > self.bucket_max[index]:
+            self.bucket_max[index] = value
+        if self.spill is not None:
+            self.pending.append(value)
+            if len(self.pending) >= self.SPILL_CHUNK:
+                self.flush()
+
+    def update_many(self, values):
+        """
+        Feed a block of values to the pass.
+        """
+        for value in values:
+            self.update(value)
+
+    def flush(self):
+        """
+        Write the buffered values to the spill file.
+        """
+        if self.spill is not None and self.pending:
+            with open(self.spill, "ab") as file:
+                self.pending.tofile(file)
+            self.pending = array("d")
+
+
+class _InfinityCount:
+    """
+    Sink counting the infinities of a file and the extremes of its finite
+    values, for ``external_select`` on data that contains infinities.
+    """
+
+    def __init__(self):
+        self.negative = 0
+        self.positive = 0
+        self.finite = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update_many(self, values):
+        """
+        Feed a block of values.
+        """
+        finite = [value for value in values if math.isfinite(value)]
+        self.negative += values.count(-math.inf)
+        self.positive += values.count(math.inf)
+        self.finite += len(finite)
+        if finite:
+            self.minimum = min(self.minimum, min(finite))
+            self.maximum = max(self.maximum, max(finite))
+
+
+def _read_spill(path, sink):
+    """
+    Feed every value of a binary spill file to a sink.
+    """
+    with open(path, "rb") as file:
+        while True:
+            chunk = array("d")
+            try:
+                chunk.fromfile(file, _RangePass.SPILL_CHUNK)
+            except EOFError:
+                sink.update_many(chunk)
+                return
+            sink.update_many(chunk)
+
+
+def external_select(file_path, stats, first_rank, last_rank, memory_budget, temp_dir=None):
+    """
+    Find the values at two adjacent ranks (0-based, ascending) of a file that
+    may not fit in memory.
+
+    Each pass histograms the remaining candidates into buckets and keeps only
+    the buckets that contain the wanted ranks. From the second pass on the
+    candidates are spilled to a binary temp file, so later passes read a file
+    that shrinks every time. Once the candidates fit in ``memory_budget`` they
+    are loaded and the ranks are selected in memory.
 
     Args:
-        file_path (str): The path to the file containing the dataset.
+        file_path (str): The path to the file, read through read_data.
+        stats (RunningStats): Moments of the file, for count, min and max.
+        first_rank (int): The lower rank to select.
+        last_rank (int): The upper rank to select, first_rank or first_rank + 1.
+        memory_budget (int): Bytes available for candidate values.
+        temp_dir (str): Directory for the spill files.
 
     Returns:
-        None
+        tuple: (value at first_rank, value at last_rank, passes over the data).
     """
-    if len(sys.argv) != 2:
-        print("Usage: python compute_statistics.py <file_path>")
-        sys.exit(1)
+    if not 0 <= first_rank <= last_rank <= first_rank + 1 or last_rank >= stats.count:
+        raise ValueError("ranks out of range")
 
-    start = time.time()
+    capacity = max(2, memory_budget // array("d").itemsize)
+    buckets = max(16, min(1 << 16, capacity // 2))
+    block_size = _budget_block_size(memory_budget)
+    below = 0
+    in_range = stats.count
+    lo, hi = stats.minimum, stats.maximum
+    source = None
+    narrowed = False
+    passes = 0
 
-    file_path = sys.argv[1]
-    data, lines = read_data(file_path)
+    if not math.isfinite(lo) or not math.isfinite(hi):
+        # infinities cannot be bucketed: count them apart and select among
+        # the finite values, whose ranks start after the -inf ones
+        passes += 1
+        infinities = _InfinityCount()
+        read_data(file_path, (infinities,), keep_values=False, verbose=False, block_size=block_size)
+        below = infinities.negative
+        in_range = infinities.finite
+        lo, hi = infinities.minimum, infinities.maximum
 
-    count_value = len(data)
-    mean_value = mean(data)
-    median_value = median(data)
-    mode_value = mode(data)
-    variance_value = variance(data, mean_value)
-    standard_deviation_value = standard_deviation(data, mean_value)
-    end = time.time()
-    elapsed_time = end - start
+        def outside(rank):
+            if rank < below:
+                return -math.inf
+            if rank >= below + in_range:
+                return math.inf
+            return None
 
-    print(f"LINES:\t{lines}")
-    print(f"COUNT:\t{count_value}")
-    print(f"MEAN:\t{mean_value}")
-    print(f"MEDIAN:\t{median_value}")
-    print(f"MODE:\t{mode_value}")
-    print(f"SD:\t{standard_deviation_value}")
-    print(f"VAR:\t{variance_value}")
+        lower, upper = outside(first_rank), outside(last_rank)
+        if lower is not None and upper is not None:
+            return lower, upper, passes
+        if lower is not None:
+            # last_rank is the smallest finite value
+            return lower, lo, passes
+        if upper is not None:
+            return hi, upper, passes
 
-    print(f"TIME:\t{elapsed_time}")
+    with tempfile.TemporaryDirectory(dir=temp_dir) as work:
+        while lo < hi:
+            passes += 1
+            collect = in_range <= capacity
+            spill_path = None
+            if not collect and narrowed:
+                spill_path = os.path.join(work, f"pass{passes}.bin")
+
+            scan = _RangePass(lo, hi, buckets, collect, spill_path)
+            if source is None:
+                read_data(file_path, (scan,), keep_values=False, verbose=False, block_size=block_size)
+            else:
+                _read_spill(source, scan)
+            scan.flush()
+
+            if collect:
+                values = scan.values
+                lower = _select(values, first_rank - below)
+                upper = _select(values, last_rank - below, first_rank - below)
+                return lower, upper, passes
+
+            cumulative = below
+            first = None
+            for index, count in enumerate(scan.histogram):
+                if first is None and cumulative + count > first_rank:
+                    first = index
+                    below = cumulative
+                if cumulative + count > last_rank:
+                    last = index
+                    break
+                cumulative += count
+
+            if first != last:
+                # adjacent ranks split across buckets: they are the largest
+                # value of the first bucket and the smallest of the last one
+                return scan.bucket_max[first], scan.bucket_min[last], passes
+
+            in_range = scan.histogram[first]
+            narrowed = True
+            lo = scan.bucket_min[first]
+            hi = scan.bucket_max[first]
+            if spill_path:
+                if source is not None:
+                    os.remove(source)
+                source = spill_path
+
+    # every remaining candidate has the same value
+    return lo, lo, passes
+
+
+def external_median(file_path, stats, memory_budget, temp_dir=None):
+    """
+    Calculate the exact median of a file that may not fit in memory.
+
+    Args:
+        file_path (str): The path to the file.
+        stats (RunningStats): Moments of the file, for count, min and max.
+        memory_budget (int): Bytes available for candidate values.
+        temp_dir (str): Directory for the spill files.
+
+    Returns:
+        tuple: (median value, passes over the data).
+    """
+    n = stats.count
+    lower, upper, passes = external_select(file_path, stats, (n - 1) // 2, n // 2, memory_budget, temp_dir)
+    if n % 2 == 0:
+        return (lower + upper) / 2, passes
+    return lower, passes
+
+
+def external_percentiles(file_path, stats, percents, memory_budget, temp_dir=None):
+    """
+    Calculate exact percentiles of a file that may not fit in memory, with
+    the same interpolation as ``percentiles``.
+
+    Args:
+        file_path (str): The path to the file.
+        stats (RunningStats): Moments of the file, for count, min and max.
+        percents (list): Percentiles to compute, each between 0 and 100.
+        memory_budget (int): Bytes available for candidate values.
+        temp_dir (str): Directory for the spill files.
+
+    Returns:
+        tuple: (list of percentile values, passes over the data).
+    """
+    results = []
+    total_passes = 0
+    for percent in percents:
+        position = percent / 100 * (stats.count - 1)
+        lower_rank = math.floor(position)
+        lower, upper, passes = external_select(
+            file_path, stats, lower_rank, math.ceil(position), memory_budget, temp_dir
+        )
+        total_passes += passes
+        # equal neighbours need no interpolation, which would turn infinities into NaN
+        if position > lower_rank and upper != lower:
+            lower += (upper - lower) * (position - lower_rank)
+        results.append(lower)
+    return results, total_passes
+
+
+def mode(data):
+    """
+    Calculates the mode of a given list of data.
+
+    Parameters:
+    data (list): The list of data for which the mode needs to be calculated,
+    or a NumPy array.
+
+    Returns:
+    The mode value of the given data. If there is more than one mode,
+    it returns the first mode encountered.
+
+    If no value appears more than once, it returns None.
+    """
+    max_frequecy, mode_value = modes(data)
+    if max_frequecy == 1:
+        return None
+    return mode_value[0]
+
+
+def modes(data):
+    """
+    Find every mode of a given list of data.
+
+    Parameters:
+    data (list): A list of numeric values, or a NumPy array.
+
+    Returns:
+    tuple: The highest frequency and the list of values that reach it,
+    in order of first appearance.
+    """
+    if _is_ndarray(data):
+        return _np_modes(data)
+    return _modes_from_counts(Counter(data))
+
+
+def top_k(data, k):
+    """
+    Find the k most frequent values of a given list of data.
+
+    A heap keeps only the best k entries of the frequency table instead of
+    sorting all of it. Ties keep the order of first appearance.
+
+    Parameters:
+    data (list): A list of numeric values, or a NumPy array.
+    k (int): Number of values to report.
+
+    Returns:
+    list: (value, count) pairs, most frequent first.
+    """
+    if _is_ndarray(data):
+        return _np_top_k(data, k)
+    return _top_from_counts(Counter(data), k)
+
+
+def _modes_from_counts(frequecy):
+    """
+    Highest frequency and tied values of a frequency table kept in order of
+    first appearance.
+    """
+    max_frequecy = max(frequecy.values())
+    mode_value = [k for k, v in frequecy.items() if v == max_frequecy]
+    return max_frequecy, mode_value
+
+
+def _mode_from_counts(frequecy):
+    """
+    Mode of a frequency table kept in order of first appearance.
+
+    Parameters:
+    frequecy (dict): Count of every value.
+
+    Returns:
+    The first mode encountered, or None if every value appears once.
+    """
+    max_frequecy, mode_value = _modes_from_counts(frequecy)
+    if max_frequecy == 1:
+        return None
+    return mode_value[0]
+
+
+def _top_from_counts(frequecy, k):
+    """
+    The k most frequent entries of a frequency table; ``heapq.nlargest`` is
+    stable, so ties keep the order of first appearance.
+    """
+    return heapq.nlargest(k, frequecy.items(), key=operator.itemgetter(1))
+
+
+class HeavyHitters:
+    """
+    Bounded-memory approximate frequency table (Misra-Gries summary).
+
+    At most ``capacity`` counters are kept. Each block of values is counted
+    exactly and merged in; when the table overflows, the (capacity + 1)-th
+    largest count is subtracted from every counter and the ones that reach
+    zero are dropped. A reported count is a lower bound of the true count and
+    is off by at most ``error``, which never exceeds n / (capacity + 1).
+    Summaries are mergeable, so partial results can be combined.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+
+    def fresh(self):
+        """
+        Return an empty summary of the same size to collect a partial result
+        into.
+
+        Returns:
+        HeavyHitters: An empty summary.
+        """
+        return HeavyHitters(self.capacity)
+
+    def update_many(self, values):
+        """
+        Count a block of values.
+
+        Parameters:
+        values (array): The values to count.
+        """
+        block = self.fresh()
+        block.counts = Counter(values)
+        self.merge(block)
+
+    def merge(self, other):
+        """
+        Merge another summary into this one.
+
+        Parameters:
+        other (HeavyHitters): The summary to merge in.
+        """
+        counts = self.counts
+        for value, count in other.counts.items():
+            counts[value] = counts.get(value, 0) + count
+        self.error += other.error
+        if len(counts) > self.capacity:
+            threshold = heapq.nlargest(self.capacity + 1, counts.values())[-1]
+            self.counts = {value: count - threshold for value, count in counts.items() if count > threshold}
+            self.error += threshold
+
+    def mode(self):
+        """
+        The approximate mode, see ``mode``.
+
+        Returns:
+        The first mode encountered, or None if no value repeats.
+        """
+        return _mode_from_counts(self.counts) if self.counts else None
+
+    def modes(self):
+        """
+        The highest (lower bound) count and the values that reach it.
+
+        Returns:
+        tuple: (count, list of tied values).
+        """
+        return _modes_from_counts(self.counts) if self.counts else (0, [])
+
+    def top(self, k):
+        """
+        The k most frequent values, with lower-bound counts.
+
+        Parameters:
+        k (int): Number of values to report.
+
+        Returns:
+        list: (value, count) pairs, most frequent first.
+        """
+        return _top_from_counts(self.counts, k)
+
+    def to_dict(self):
+        """
+        Serializable representation of the summary.
+
+        Returns:
+        dict: The summary state.
+        """
+        return {
+            "capacity": self.capacity,
+            "error": self.error,
+            "values": list(self.counts),
+            "counts": list(self.counts.values()),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a summary from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The summary state.
+
+        Returns:
+        HeavyHitters: The restored summary.
+        """
+        summary = cls(state["capacity"])
+        summary.error = state["error"]
+        summary.counts = dict(zip(state["values"], state["counts"]))
+        return summary
+
+
+def variance(data, mean_value):
+    """
+    Calculate the variance of a given list of data.
+
+    Parameters:
+    data (list): A list of numeric values, or a NumPy array.
+
+    Returns:
+    float: The variance of the data.
+    """
+    if _is_ndarray(data):
+        return float(np.square(data - mean_value).sum() / (len(data) - 1))
+    return sum((x - mean_value) ** 2 for x in data) / (len(data) - 1)
+
+def standard_deviation(data, mean_value):
+    """
+    Calculate the standard deviation of a given list of data.
+
+    Parameters:
+    data (list): A list of numeric values, or a NumPy array.
+
+    Returns:
+    float: The standard deviation of the data.
+    """
+    # STDEVP function in Excel uses n instead of n - 1
+    if _is_ndarray(data):
+        return float(np.sqrt(np.square(data - mean_value).sum() / len(data)))
+    _variance = sum((x - mean_value) ** 2 for x in data) / len(data)
+    return _variance ** 0.5
+
+
+def _np_median(data):
+    """
+    Median of a NumPy array using ``np.partition``, which works on a copy so
+    the caller's array is left as it was.
+    """
+    n = len(data)
+    middle = n // 2
+    kth = [middle - 1, middle] if n % 2 == 0 else [middle]
+    data = np.partition(data, kth)
+    if n % 2 == 0:
+        return float((data[middle - 1] + data[middle]) / 2)
+    return float(data[middle])
+
+
+def _np_modes(data):
+    """
+    Modes of a NumPy array from ``np.unique`` counts, in order of first
+    appearance like the pure-Python path.
+    """
+    _, first_index, counts = np.unique(data, return_index=True, return_counts=True)
+    max_count = counts.max()
+    ties = np.sort(first_index[counts == max_count])
+    return int(max_count), [float(value) for value in data[ties]]
+
+
+def _np_top_k(data, k):
+    """
+    The k most frequent values of a NumPy array, ties by first appearance.
+    """
+    _, first_index, counts = np.unique(data, return_index=True, return_counts=True)
+    order = np.lexsort((first_index, -counts))[:k]
+    return [(float(data[first_index[i]]), int(counts[i])) for i in order]
+
+
+class KLLSketch:
+    """
+    Mergeable KLL quantile sketch (Karnin, Lang and Liberty).
+
+    Values are kept in a hierarchy of compactors; level h holds items of
+    weight 2**h. When the sketch is full the lowest overfull level is sorted
+    and every other item (random offset) is promoted to the next level, so
+    memory stays at O(k) items however many values are added. Sketches built
+    over different inputs can be merged and saved as JSON.
+    """
+
+    # DataSketches' empirical single-sided normalized rank error for KLL
+    ERROR_SCALE = 2.296
+    ERROR_EXPONENT = 0.9723
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.compactors = [[]]
+        self.size = 0
+        self.max_size = self._capacity(0)
+        self._random = random.Random(seed)
+
+    @classmethod
+    def for_error(cls, error, seed=0):
+        """
+        Create a sketch sized for a target normalized rank error.
+
+        Parameters:
+        error (float): The rank error, e.g. 0.01 for 1%.
+        seed (int): Seed for the compaction coin flips.
+
+        Returns:
+        KLLSketch: An empty sketch.
+        """
+        k = math.ceil((cls.ERROR_SCALE / error) ** (1 / cls.ERROR_EXPONENT))
+        return cls(max(8, k), seed)
+
+    @property
+    def rank_error(self):
+        """
+        Normalized rank error of quantiles answered by the sketch.
+        """
+        if self.count == self.size:
+            return 0.0
+        return self.ERROR_SCALE / self.k ** self.ERROR_EXPONENT
+
+    def _capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return math.ceil(self.k * (2 / 3) ** depth) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        while self.size >= self.max_size:
+            for height, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity(height):
+                    break
+            if height + 1 == len(self.compactors):
+                self._grow()
+            compactor.sort()
+            kept = [compactor.pop()] if len(compactor) % 2 else []
+            offset = self._random.getrandbits(1)
+            self.compactors[height + 1].extend(compactor[offset::2])
+            self.size -= len(compactor) // 2
+            compactor[:] = kept
+
+    def update(self, value):
+        """
+        Add a single value to the sketch.
+
+        Parameters:
+        value (float): The value to add.
+        """
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if self.size >= self.max_size:
+            self._compress()
+
+    def fresh(self):
+        """
+        Return an empty sketch with the same size to collect a partial
+        result into.
+
+        Returns:
+        KLLSketch: An empty sketch.
+        """
+        return KLLSketch(self.k)
+
+    def update_many(self, values):
+        """
+        Add a block of values to the sketch. The block is sketched on its own
+        and merged in, the same as a worker's partial sketch would be.
+
+        Parameters:
+        values (array): The values to add.
+        """
+        block = self.fresh()
+        block.extend(values)
+        self.merge(block)
+
+    def extend(self, values):
+        """
+        Add a block of values directly to this sketch.
+
+        Parameters:
+        values (array): The values to add.
+        """
+        count = len(values)
+        if count == 0:
+            return
+        self.count += count
+        self.minimum = min(self.minimum, min(values))
+        self.maximum = max(self.maximum, max(values))
+        start = 0
+        while start < count:
+            chunk = values[start:start + max(1, self.max_size - self.size)]
+            self.compactors[0].extend(chunk)
+            self.size += len(chunk)
+            start += len(chunk)
+            if self.size >= self.max_size:
+                self._compress()
+
+    def merge(self, other):
+        """
+        Merge another sketch of the same ``k`` into this one.
+
+        Parameters:
+        other (KLLSketch): The sketch to merge in.
+
+        Raises:
+        ValueError: If the sketches have different ``k``, as the merged
+        sketch would not keep this one's rank error.
+        """
+        if self.k != other.k:
+            raise ValueError(f"a sketch with k={other.k} cannot be merged into one with k={self.k}")
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, compactor in enumerate(other.compactors):
+            self.compactors[height].extend(compactor)
+        self.size += other.size
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._compress()
+
+    def _exact(self):
+        """
+        Copy of the values if nothing has been compacted yet, else None.
+        """
+        if self.count != self.size:
+            return None
+        return array("d", self.compactors[0])
+
+    def _weighted(self):
+        items = sorted(
+            (value, 1 << height)
+            for height, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        return items
+
+    def median(self):
+        """
+        Approximate median of the values added so far.
+
+        Returns:
+        float: The median, exact while the sketch has not compacted.
+        """
+        exact = self._exact()
+        if exact is not None:
+            return median(exact)
+        return self.quantiles([50])[0]
+
+    def quantiles(self, percents):
+        """
+        Approximate percentiles of the values added so far.
+
+        Parameters:
+        percents (list): Percentiles to compute, each between 0 and 100.
+
+        Returns:
+        list: The percentile values, in the same order as ``percents``.
+        """
+        exact = self._exact()
+        if exact is not None:
+            return percentiles(exact, percents)
+
+        items = self._weighted()
+        total = sum(weight for _, weight in items)
+        results = []
+        for percent in percents:
+            if percent <= 0:
+                results.append(self.minimum)
+                continue
+            if percent >= 100:
+                results.append(self.maximum)
+                continue
+            target = percent / 100 * total
+            cumulative = 0
+            for value, weight in items:
+                cumulative += weight
+                if cumulative >= target:
+                    break
+            results.append(value)
+        return results
+
+    def to_dict(self):
+        """
+        Serializable representation of the sketch.
+
+        Returns:
+        dict: The sketch state.
+        """
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "compactors": self.compactors,
+        }
+
+    @classmethod
+    def from_dict(cls, state, seed=0):
+        """
+        Rebuild a sketch from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The sketch state.
+        seed (int): Seed for later compactions.
+
+        Returns:
+        KLLSketch: The restored sketch.
+        """
+        sketch = cls(state["k"], seed)
+        sketch.count = state["count"]
+        sketch.minimum = state["min"]
+        sketch.maximum = state["max"]
+        sketch.compactors = [list(compactor) for compactor in state["compactors"]]
+        sketch.size = sum(len(compactor) for compactor in sketch.compactors)
+        sketch.max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        return sketch
+
+
+def save_summary(path, lines, stats, sketch, heavy_hitters):
+    """
+    Save a partial approximate summary (moments, quantile sketch and heavy
+    hitters) as JSON.
+
+    Args:
+        path (str): The output file.
+        lines (int): Number of lines read.
+        stats (RunningStats): The moments.
+        sketch (KLLSketch): The quantile sketch.
+        heavy_hitters (HeavyHitters): The approximate frequency table.
+
+    Returns:
+        None
+    """
+    summary = {
+        "lines": lines,
+        "stats": stats.to_dict(),
+        "sketch": sketch.to_dict(),
+        "heavy_hitters": heavy_hitters.to_dict(),
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(summary, file)
+
+
+def load_summary(path):
+    """
+    Load a summary written by ``save_summary``.
+
+    Args:
+        path (str): The summary file.
+
+    Returns:
+        tuple: (lines, RunningStats, KLLSketch, HeavyHitters).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            summary = json.load(file)
+    except FileNotFoundError:
+        print(f"Error: Sketch file {path} does not exist.")
+        sys.exit(1)
+    return (
+        summary["lines"],
+        RunningStats.from_dict(summary["stats"]),
+        KLLSketch.from_dict(summary["sketch"]),
+        HeavyHitters.from_dict(summary["heavy_hitters"]),
+    )
+
+
+def describe(values, percents=(), k=0):
+    """
+    Compute the standard stat block of one series of values.
+
+    Parameters:
+    values (array): The values, an ``array('d')`` or a NumPy array.
+    percents (list): Percentiles to report.
+    k (int): Number of most frequent values to report.
+
+    Returns:
+    list: (label, value) pairs, in report order.
+    """
+    if not len(values):
+        return [("COUNT", 0)]
+
+    if _is_ndarray(values):
+        mean_value = mean(values)
+        variance_value = variance(values, mean_value)
+        standard_deviation_value = standard_deviation(values, mean_value)
+    else:
+        stats = RunningStats()
+        stats.update_many(values)
+        mean_value = stats.mean
+        variance_value = stats.variance()
+        standard_deviation_value = stats.standard_deviation()
+    mode_count, mode_ties = modes(values)
+    top_values = top_k(values, k) if k else []
+
+    results = [
+        ("COUNT", len(values)),
+        ("MEAN", mean_value),
+        ("MEDIAN", median(values)),
+    ]
+    if percents:
+        results.extend((f"P{percent:g}", value) for percent, value in zip(percents, percentiles(values, percents)))
+    results.extend([
+        ("MODE", mode_ties[0] if mode_count > 1 else None),
+        ("MODE COUNT", mode_count),
+    ])
+    if mode_count > 1:
+        results.append(("MODE TIES", ", ".join(map(str, mode_ties))))
+    results.extend((f"TOP{rank}", f"{value}\t{count}") for rank, (value, count) in enumerate(top_values, 1))
+    results.extend([
+        ("SD", standard_deviation_value),
+        ("VAR", variance_value),
+    ])
+    return results
+
+
+class _SkiplistNode:
+    """A value and its forward links, with the width of every link."""
+
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths
+
+
+class SortedSkiplist:
+    """
+    Indexable skiplist: a sorted multiset of finite values with insert,
+    remove and lookup by rank in expected O(log n).
+
+    Every link stores how many values it skips, so the value at a rank is
+    found by walking down the levels like a search by value. The tail
+    sentinel is +inf, which is why the values must be finite.
+    """
+
+    def __init__(self, expected_size=1 << 16, seed=0):
+        self.size = 0
+        self.levels = max(1, int(math.log2(max(expected_size, 2))) + 1)
+        tail = _SkiplistNode(math.inf, [], [])
+        self.head = _SkiplistNode(None, [tail] * self.levels, [1] * self.levels)
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, rank):
+        if not 0 <= rank < self.size:
+            raise IndexError("skiplist index out of range")
+        node = self.head
+        rank += 1
+        for level in reversed(range(self.levels)):
+            while node.width[level] <= rank:
+                rank -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value):
+        """
+        Add a value.
+
+        Parameters:
+        value (float): A finite value.
+        """
+        chain = [None] * self.levels
+        steps_at_level = [0] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        # geometric height: each level is kept with probability 1/2
+        height = min(self.levels, 1 - int(math.log2(1.0 - self._random.random())))
+        new_node = _SkiplistNode(value, [None] * height, [None] * height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        """
+        Remove one occurrence of a value.
+
+        Parameters:
+        value (float): A value in the skiplist.
+
+        Raises:
+        KeyError: If the value is not in the skiplist.
+        """
+        chain = [None] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target.value != value:
+            raise KeyError(value)
+
+        for level, following in enumerate(target.next):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = following
+        for level in range(len(target.next), self.levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class WindowStats:
+    """
+    Statistics over a sliding window of the most recent values.
+
+    The window holds the last ``size`` values and/or the values that arrived
+    in the last ``seconds``. Mean and variance are updated in O(1) for every
+    value that enters or leaves (Welford's update and its inverse), order
+    statistics come from a ``SortedSkiplist`` and the modes from a counter of
+    the values in the window.
+    """
+
+    def __init__(self, size=None, seconds=None):
+        self.size = size
+        self.seconds = seconds
+        self.window = deque()
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ordered = SortedSkiplist(size or 1 << 16)
+        self.frequency = Counter()
+
+    def update(self, value, now):
+        """
+        Add a value that arrived at time ``now`` and evict the values that
+        fell out of the window.
+
+        Parameters:
+        value (float): A finite value.
+        now (float): Arrival time in seconds.
+        """
+        self.window.append((now, value))
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.ordered.insert(value)
+        self.frequency[value] += 1
+
+        if self.size is not None and self.count > self.size:
+            self._evict()
+        self.expire(now)
+
+    def expire(self, now):
+        """
+        Evict the values older than the time window.
+
+        Parameters:
+        now (float): The current time in seconds.
+        """
+        if self.seconds is None:
+            return
+        while self.window and self.window[0][0] <= now - self.seconds:
+            self._evict()
+
+    def _evict(self):
+        _, value = self.window.popleft()
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+        else:
+            previous_mean = self.mean
+            self.mean -= (value - self.mean) / self.count
+            # rounding can leave a tiny negative sum of squares
+            self.m2 = max(self.m2 - (value - previous_mean) * (value - self.mean), 0.0)
+        self.ordered.remove(value)
+        self.frequency[value] -= 1
+        if not self.frequency[value]:
+            del self.frequency[value]
+
+    def percentiles(self, percents):
+        """
+        Percentiles of the window, interpolated like ``percentiles``.
+
+        Parameters:
+        percents (list): Percentiles to compute, each between 0 and 100.
+
+        Returns:
+        list: The percentile values, in the same order as ``percents``.
+        """
+        results = []
+        for percent in percents:
+            position = percent / 100 * (self.count - 1)
+            lower = math.floor(position)
+            value = self.ordered[lower]
+            if position > lower:
+                value += (self.ordered[lower + 1] - value) * (position - lower)
+            results.append(value)
+        return results
+
+    def median(self):
+        """
+        Median of the window.
+
+        Returns:
+        float: The median value.
+        """
+        middle = self.count // 2
+        if self.count % 2:
+            return self.ordered[middle]
+        return (self.ordered[middle - 1] + self.ordered[middle]) / 2
+
+    def results(self, percents=(), k=0):
+        """
+        The stat block of the window, like ``describe``.
+
+        Parameters:
+        percents (list): Percentiles to report.
+        k (int): Number of most frequent values to report.
+
+        Returns:
+        list: (label, value) pairs, in report order.
+        """
+        if self.count == 0:
+            return [("COUNT", 0)]
+        mode_count, mode_ties = _modes_from_counts(self.frequency)
+        results = [
+            ("COUNT", self.count),
+            ("MEAN", self.mean),
+            ("MEDIAN", self.median()),
+        ]
+        results.extend((f"P{percent:g}", value) for percent, value in zip(percents, self.percentiles(percents)))
+        results.extend([
+            ("MODE", mode_ties[0] if mode_count > 1 else None),
+            ("MODE COUNT", mode_count),
+        ])
+        if mode_count > 1:
+            results.append(("MODE TIES", ", ".join(map(str, mode_ties))))
+        top_values = _top_from_counts(self.frequency, k) if k else []
+        results.extend((f"TOP{rank}", f"{value}\t{count}") for rank, (value, count) in enumerate(top_values, 1))
+        results.extend([
+            # sample variance and population SD, as in RunningStats
+            ("SD", (self.m2 / self.count) ** 0.5),
+            ("VAR", self.m2 / (self.count - 1) if self.count > 1 else math.nan),
+        ])
+        return results
+
+
+def follow_lines(file_path, poll_interval=0.5):
+    """
+    Yield the lines of a file as it grows, like ``tail -f``, or of stdin
+    when the path is "-".
+
+    When the file has no new complete line, None is yielded before sleeping
+    for ``poll_interval`` so the caller can do periodic work. A file that
+    shrinks (truncated or rotated in place) is read again from the start.
+    Stdin is read until it is closed.
+
+    Args:
+        file_path (str): The path to the file, or "-" for stdin.
+        poll_interval (float): Seconds to wait for new data.
+
+    Yields:
+        str: Complete lines, or None while waiting for data.
+    """
+    if file_path == "-":
+        yield from sys.stdin
+        return
+    try:
+        file = open(file_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        print("Error: File does not exist.")
+        sys.exit(1)
+
+    with file:
+        pending = ""
+        while True:
+            line = file.readline()
+            if line:
+                pending += line
+                if pending.endswith("\n"):
+                    yield pending
+                    pending = ""
+                continue
+            try:
+                truncated = os.stat(file_path).st_size < file.tell()
+            except FileNotFoundError:
+                truncated = False
+            if truncated:
+                file.seek(0)
+                pending = ""
+                continue
+            yield None
+            time.sleep(poll_interval)
+
+
+def follow(args):
+    """
+    Keep live statistics over a sliding window of a growing file or stdin,
+    writing a refreshed stat block every ``args.interval`` seconds and once
+    more when the input ends or the run is interrupted.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        None
+    """
+    start = time.time()
+    window = WindowStats(args.window, args.window_seconds)
+    lines = 0
+
+    def emit():
+        window.expire(time.monotonic())
+        write_results([
+            ("LINES", lines),
+            *window.results(args.percentiles, args.top_k),
+            ("TIME", time.time() - start),
+        ])
+
+    next_emit = time.monotonic() + args.interval
+    try:
+        for line in follow_lines(args.file_path, min(args.interval, 0.5)):
+            now = time.monotonic()
+            if line is not None and line.strip():
+                lines += 1
+                try:
+                    value = float(line)
+                except ValueError:
+                    print(f"Error in line {lines}: {line.strip()} is not a number.")
+                else:
+                    # inf or NaN could never be evicted from the moments
+                    if math.isfinite(value):
+                        window.update(value, now)
+                    else:
+                        print(f"Error in line {lines}: {line.strip()} is not a finite number.")
+            if now >= next_emit:
+                emit()
+                next_emit = now + args.interval
+    except KeyboardInterrupt:
+        pass
+    emit()
+
+
+FINGERPRINT_SAMPLE = 1 << 16
+FINGERPRINT_POINTS = 16
+
+
+def prefix_fingerprint(file_path, offset):
+    """
+    Cheap content fingerprint of the first ``offset`` bytes of a file.
+
+    Hashing a multi-GB prefix on every run would cost as much as parsing it,
+    so only the head, the tail and evenly spaced samples of the prefix are
+    hashed (BLAKE2b), together with its length. Rewrites anywhere near the
+    sampled regions, truncation and a changed length are all detected.
+
+    Args:
+        file_path (str): The path to the file.
+        offset (int): Length of the prefix.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.blake2b(str(offset).encode(), digest_size=16)
+    positions = {0, max(0, offset - FINGERPRINT_SAMPLE)}
+    positions.update(offset * i // (FINGERPRINT_POINTS + 1) for i in range(1, FINGERPRINT_POINTS + 1))
+    with open(file_path, "rb") as file:
+        for position in sorted(positions):
+            file.seek(position)
+            digest.update(file.read(min(FINGERPRINT_SAMPLE, offset - position)))
+    return digest.hexdigest()
+
+
+def last_line_end(file_path, start, stop):
+    """
+    Offset just past the last newline between ``start`` and ``stop``, read
+    backwards in blocks, so a line still being written is left for later.
+
+    Args:
+        file_path (str): The path to the file.
+        start (int): First byte to search.
+        stop (int): One past the last byte to search.
+
+    Returns:
+        int: The end of the last complete line, or ``start`` if there is none.
+    """
+    with open(file_path, "rb") as file:
+        end = stop
+        while end > start:
+            begin = max(start, end - FINGERPRINT_SAMPLE)
+            file.seek(begin)
+            newline = file.read(end - begin).rfind(b"\n")
+            if newline != -1:
+                return begin + newline + 1
+            end = begin
+    return start
+
+
+def state_settings(args):
+    """
+    The options a saved state depends on: the mode, and in --approx mode the
+    sketch's rank error and the heavy hitters' capacity.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        dict: The settings, stored with the state.
+    """
+    if args.approx:
+        return {"approx": True, "error": args.error, "mode_capacity": args.mode_capacity}
+    return {"approx": False}
+
+
+def load_state(state_path, file_path, size, settings):
+    """
+    Load the incremental state saved by ``save_state`` if it still describes
+    a prefix of the file.
+
+    The state is discarded when it is missing or unreadable, was built with
+    other settings (mode, --error or --mode-capacity), is longer than the
+    file, or the prefix fingerprint changed.
+
+    Args:
+        state_path (str): The sidecar state file.
+        file_path (str): The path to the data file.
+        size (int): Current size of the data file.
+        settings (dict): The run's ``state_settings``.
+
+    Returns:
+        dict: The state, or None if everything has to be recomputed.
+    """
+    try:
+        with open(state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    offset = state.get("offset", 0)
+    if state.get("settings") != settings or offset > size:
+        return None
+    if prefix_fingerprint(file_path, offset) != state.get("fingerprint"):
+        return None
+    return state
+
+
+def save_state(state_path, file_path, offset, lines, stats, summaries, settings):
+    """
+    Save the incremental state of an append-only data file as JSON.
+
+    Args:
+        state_path (str): The sidecar state file.
+        file_path (str): The path to the data file.
+        offset (int): Bytes of the file processed so far, the end of a line.
+        lines (int): Lines read so far.
+        stats (RunningStats): The merged moments.
+        summaries (dict): The merged frequency table, or quantile sketch and
+            heavy hitters in --approx mode, by name.
+        settings (dict): The ``state_settings`` the summaries were built with.
+
+    Returns:
+        None
+    """
+    state = {
+        "offset": offset,
+        "fingerprint": prefix_fingerprint(file_path, offset),
+        "lines": lines,
+        "settings": settings,
+        "stats": stats.to_dict(),
+        "summaries": {name: summary.to_dict() for name, summary in summaries.items()},
+    }
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(temp_path, state_path)
+
+
+def parse_percents(text):
+    """
+    Parse a comma separated list of percentiles, e.g. "50,90,99".
+
+    Args:
+        text (str): The command line value.
+
+    Returns:
+        list: The percentiles as floats.
+    """
+    try:
+        percents = [float(item) for item in text.split(",") if item.strip()]
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid percentile list: {text}") from error
+    for percent in percents:
+        if not 0 <= percent <= 100:
+            raise argparse.ArgumentTypeError(f"percentile {percent:g} is not between 0 and 100")
+    return percents
+
+
+def parse_size(text):
+    """
+    Parse a byte size such as "4096", "512K", "64M" or "2G".
+
+    Args:
+        text (str): The command line value.
+
+    Returns:
+        int: The size in bytes.
+    """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().removesuffix("B")
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}") from error
+    if size <= 0:
+        raise argparse.ArgumentTypeError("size must be positive")
+    return size
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+
+    Args:
+        argv (list): The arguments, defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="compute_statistics.py",
+        description="Compute statistics for a given dataset.",
+    )
+    parser.add_argument(
+        "file_path",
+        nargs="?",
+        help="file with one number per line ('-' for stdin with --follow); optional with --sketch-in",
+    )
+    parser.add_argument(
+        "--percentiles",
+        type=parse_percents,
+        default=[],
+        metavar="P[,P...]",
+        help="also report these percentiles, e.g. 50,90,99",
+    )
+    parser.add_argument(
+        "--columns",
+        metavar="NAME[,NAME...]",
+        help="treat the file as CSV/TSV with a header and report every listed column",
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="NAME",
+        help="with --columns, report every column once per value of this column",
+    )
+    parser.add_argument(
+        "--delimiter",
+        help="with --columns, the field separator (default: tab for .tsv files, else comma)",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="keep reading the file as it grows (or stdin) and report a sliding window",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        metavar="N",
+        help="with --follow, the window holds the last N values (default: 1000)",
+    )
+    parser.add_argument(
+        "--window-seconds",
+        type=float,
+        metavar="T",
+        help="with --follow, the window holds the values of the last T seconds",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        metavar="S",
+        help="with --follow, report every S seconds (default: 1)",
+    )
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="estimate MEDIAN and percentiles with a fixed-memory quantile sketch",
+    )
+    parser.add_argument(
+        "--error",
+        type=float,
+        default=0.01,
+        help="target normalized rank error of the sketch (default: 0.01)",
+    )
+    parser.add_argument(
+        "--sketch-in",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="merge a summary saved with --sketch-out (repeatable); the run uses the saved sketch's "
+        "size, so all the summaries must have been built with the same --error",
+    )
+    parser.add_argument(
+        "--sketch-out",
+        metavar="FILE",
+        help="save the merged summary so later runs can merge it",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="FILE",
+        help="sidecar state file: only the bytes appended since the last run are parsed. A rewritten "
+        "prefix is detected from its length and sampled regions (head, tail and 16 points of 64 KiB), "
+        "not from every byte",
+    )
+    parser.add_argument(
+        "--numpy",
+        action="store_true",
+        help="compute the statistics with vectorized NumPy (pure Python if not installed)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="parse the file in N worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        metavar="K",
+        help="also report the K most frequent values with their counts",
+    )
+    parser.add_argument(
+        "--mode-capacity",
+        type=int,
+        default=1024,
+        metavar="M",
+        help="counters kept for the approximate mode with --approx or --max-memory (default: 1024)",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="compute the exact median out of core within this memory budget, e.g. 512M; it bounds "
+        "the candidate values and parse blocks, not the interpreter itself",
+    )
+    parser.add_argument(
+        "--temp-dir",
+        metavar="DIR",
+        help="directory for the out-of-core spill files (default: system temp)",
+    )
+    args = parser.parse_args(argv)
+    if args.file_path is None:
+        if not args.sketch_in:
+            parser.error("the following arguments are required: file_path")
+        if args.state:
+            parser.error("--state requires a file")
+    if args.state and (args.max_memory or args.numpy):
+        parser.error("--state cannot be combined with --max-memory or --numpy")
+    if args.group_by and not args.columns:
+        parser.error("--group-by requires --columns")
+    if args.columns and (args.approx or args.max_memory or args.state or args.workers > 1):
+        parser.error("--columns cannot be combined with --approx, --max-memory, --state or --workers")
+    if args.columns and args.delimiter is None:
+        args.delimiter = "\t" if args.file_path.lower().endswith((".tsv", ".tab")) else ","
+    if args.follow:
+        if args.columns or args.approx or args.max_memory or args.state or args.numpy or args.workers > 1:
+            parser.error("--follow cannot be combined with --columns, --approx, --max-memory, --state, "
+                         "--numpy or --workers")
+        if args.window is None and args.window_seconds is None:
+            args.window = 1000
+        if (args.window is not None and args.window < 1) or (args.window_seconds is not None
+                                                             and args.window_seconds <= 0):
+            parser.error("--window and --window-seconds must be positive")
+        if args.interval <= 0:
+            parser.error("--interval must be positive")
+    elif args.window is not None or args.window_seconds is not None:
+        parser.error("--window and --window-seconds require --follow")
+    elif args.file_path == "-":
+        parser.error("reading stdin requires --follow")
+    if args.top_k < 0 or args.mode_capacity < 1:
+        parser.error("--top-k must not be negative and --mode-capacity must be positive")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if sum((args.approx, bool(args.max_memory), args.numpy)) > 1:
+        parser.error("--approx, --max-memory and --numpy cannot be combined")
+    if not 0 < args.error < 1:
+        parser.error("--error must be between 0 and 1")
+    if (args.sketch_in or args.sketch_out) and not args.approx:
+        parser.error("--sketch-in and --sketch-out require --approx")
+    return args
+
+
+def write_results(results):
+    """
+    Print the results and save them to statistics_results.txt.
+
+    Args:
+        results (list): (label, value) pairs in output order.
+
+    Returns:
+        None
+    """
+    lines = [f"{label}:\t{value}\n" for label, value in results]
+    sys.stdout.writelines(lines)
+    with open("statistics_results.txt", "w", encoding="utf-8") as file:
+        file.writelines(lines)
+
+
+SUMMARY_TYPES = {"frequency": FrequencyTable, "sketch": KLLSketch, "heavy_hitters": HeavyHitters}
+
+
+def update_state(args):
+    """
+    Bring the incremental state of the data file up to date: reuse the saved
+    moments and frequency table (or sketch) and parse only the appended tail.
+    A last line without its newline is left for the next run.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        tuple: (byte offset parsing resumed at, lines, RunningStats, dict of
+        summaries by name).
+    """
+    try:
+        size = os.path.getsize(args.file_path)
+    except FileNotFoundError:
+        print("Error: File does not exist.")
+        sys.exit(1)
+
+    settings = state_settings(args)
+    state = load_state(args.state, args.file_path, size, settings)
+    if state is None:
+        offset = lines = 0
+        stats = RunningStats()
+        summaries = new_summaries(args)
+    else:
+        offset = state["offset"]
+        lines = state["lines"]
+        stats = RunningStats.from_dict(state["stats"])
+        summaries = {
+            name: SUMMARY_TYPES[name].from_dict(summary) for name, summary in state["summaries"].items()
+        }
+
+    # a last line without its newline may still be being written
+    stop = last_line_end(args.file_path, offset, size)
+    _, new_lines = read_data(
+        args.file_path, (stats, *summaries.values()), keep_values=False, workers=args.workers,
+        start=offset, stop=stop, lines_before=lines,
+    )
+    save_state(args.state, args.file_path, stop, lines + new_lines, stats, summaries, settings)
+    return offset, lines + new_lines, stats, summaries
+
+
+def new_summaries(args):
+    """
+    Empty summaries for the selected mode: the exact frequency table, or the
+    quantile sketch and heavy hitters in --approx mode.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        dict: The summaries by name.
+    """
+    if args.approx:
+        return {"sketch": KLLSketch.for_error(args.error), "heavy_hitters": HeavyHitters(args.mode_capacity)}
+    return {"frequency": FrequencyTable()}
+
+
+def main():
+    """
+    Compute statistics for a given dataset.
+
+    Usage: python compute_statistics.py [<file_path>] [--percentiles P[,P...]] [--top-k K]
+           [--columns NAME[,NAME...] [--group-by NAME] [--delimiter SEP]]
+           [--follow [--window N] [--window-seconds T] [--interval S]]
+           [--approx [--error EPS] [--sketch-in FILE] [--sketch-out FILE]] [--mode-capacity M]
+           [--max-memory SIZE [--temp-dir DIR]] [--numpy] [--workers N] [--state FILE]
+
+    Args:
+        file_path (str): The path to the file containing the dataset.
+
+    Returns:
+        None
+    """
+    args = parse_args()
+    if args.numpy and np is None:
+        print("Warning: NumPy is not installed, using the pure-Python functions.")
+        args.numpy = False
+
+    if args.follow:
+        follow(args)
+        return
+
+    start = time.time()
+
+    if args.columns:
+        columns = [column.strip() for column in args.columns.split(",") if column.strip()]
+        series, lines = read_columns(args.file_path, columns, args.group_by, args.delimiter)
+        results = [("LINES", lines)]
+        for label, values in series.items():
+            if args.numpy:
+                values = np.frombuffer(values, dtype=np.float64)
+            results.append(("SERIES", label))
+            results.extend(describe(values, args.percentiles, args.top_k))
+        results.append(("TIME", time.time() - start))
+        write_results(results)
+        return
+
+    if (args.state or args.max_memory) and os.path.exists(args.file_path) and not os.path.isfile(args.file_path):
+        # both reread the file, which a pipe cannot do
+        print("Error: --state and --max-memory require a regular file.")
+        sys.exit(1)
+
+    stats = RunningStats()
+    if args.state:
+        resumed_at, lines, stats, summaries = update_state(args)
+
+    if args.approx:
+        saved = [load_summary(path) for path in args.sketch_in]
+        if not args.state:
+            summaries = new_summaries(args)
+            if saved:
+                # sketches only merge with the same k: reuse the saved one's
+                summaries["sketch"] = saved[0][2].fresh()
+            lines = 0
+            if args.file_path is not None:
+                _, lines = read_data(
+                    args.file_path, (stats, *summaries.values()), keep_values=False, workers=args.workers
+                )
+        sketch = summaries["sketch"]
+        frequency = summaries["heavy_hitters"]
+        for path, (other_lines, other_stats, other_sketch, other_heavy_hitters) in zip(args.sketch_in, saved):
+            try:
+                sketch.merge(other_sketch)
+            except ValueError as error:
+                print(f"Error: {path}: {error}; the sketches were built with different --error values.")
+                sys.exit(1)
+            lines += other_lines
+            stats.merge(other_stats)
+            frequency.merge(other_heavy_hitters)
+        if args.sketch_out:
+            save_summary(args.sketch_out, lines, stats, sketch, frequency)
+
+        median_value = sketch.median()
+        percentile_values = sketch.quantiles(args.percentiles)
+    elif args.state:
+        frequency = summaries["frequency"]
+        median_value = frequency.median()
+        percentile_values = frequency.quantiles(args.percentiles)
+    elif args.max_memory:
+        # an exact mode needs the full frequency table: use heavy hitters
+        frequency = HeavyHitters(args.mode_capacity)
+        _, lines = read_data(
+            args.file_path, (stats, frequency), keep_values=False, workers=args.workers,
+            block_size=_budget_block_size(args.max_memory),
+        )
+        median_value, passes = external_median(args.file_path, stats, args.max_memory, args.temp_dir)
+        percentile_values, percentile_passes = external_percentiles(
+            args.file_path, stats, args.percentiles, args.max_memory, args.temp_dir
+        )
+        # the first pass is the one above that computed the moments
+        passes += percentile_passes + 1
+    elif args.numpy:
+        data, lines = read_data(args.file_path, workers=args.workers)
+        data = np.frombuffer(data, dtype=np.float64)
+        frequency = None
+        mode_count, mode_ties = modes(data)
+        top_values = top_k(data, args.top_k) if args.top_k else []
+        median_value = median(data)
+        percentile_values = percentiles(data, args.percentiles) if args.percentiles else []
+    else:
+        # MODE is counted from the values once they are read, not by a
+        # frequency table kept alongside them while parsing
+        data, lines = read_data(args.file_path, (stats,), workers=args.workers)
+        median_value = median(data)
+        percentile_values = percentiles(data, args.percentiles) if args.percentiles else []
+        frequency = None
+        counts = Counter(data)
+        mode_count, mode_ties = _modes_from_counts(counts)
+        top_values = _top_from_counts(counts, args.top_k) if args.top_k else []
+        del counts
+
+    if frequency is not None:
+        mode_count, mode_ties = frequency.modes()
+        top_values = frequency.top(args.top_k) if args.top_k else []
+    mode_value = mode_ties[0] if mode_count > 1 else None
+
+    if args.numpy:
+        count_value = len(data)
+        mean_value = mean(data)
+        variance_value = variance(data, mean_value)
+        standard_deviation_value = standard_deviation(data, mean_value)
+    else:
+        # mean, VAR and SD come from the single-pass accumulator
+        count_value = stats.count
+        mean_value = stats.mean
+        variance_value = stats.variance()
+        standard_deviation_value = stats.standard_deviation()
+    end = time.time()
+    elapsed_time = end - start
+
+    results = [
+        ("LINES", lines),
+        ("COUNT", count_value),
+        ("MEAN", mean_value),
+        ("MEDIAN", median_value),
+    ]
+    results.extend((f"P{percent:g}", value) for percent, value in zip(args.percentiles, percentile_values))
+    if args.approx:
+        results.append(("RANK ERROR", sketch.rank_error))
+    if args.max_memory:
+        results.append(("PASSES", passes))
+    if args.state:
+        results.append(("RESUMED AT", resumed_at))
+    results.extend([
+        ("MODE", mode_value),
+        ("MODE COUNT", mode_count),
+    ])
+    if mode_count > 1:
+        results.append(("MODE TIES", ", ".join(map(str, mode_ties))))
+    if isinstance(frequency, HeavyHitters):
+        results.append(("MODE ERROR", frequency.error))
+    results.extend((f"TOP{rank}", f"{value}\t{count}") for rank, (value, count) in enumerate(top_values, 1))
+    results.extend([
+        ("SD", standard_deviation_value),
+        ("VAR", variance_value),
+        ("TIME", elapsed_time),
+    ])
+    write_results(results)
 
-    # save the results to a file statistics_results.txt
-    with open("statistics_results.txt", "w", encoding="utf-8") as file:
-        file.write(f"LINES:\t{lines}\n")
-        file.write(f"COUNT:\t{count_value}\n")
-        file.write(f"MEAN:\t{mean_value}\n")
-        file.write(f"MEDIAN:\t{median_value}\n")
-        file.write(f"MODE:\t{mode_value}\n")
-        file.write(f"SD:\t{standard_deviation_value}\n")
-        file.write(f"VAR:\t{variance_value}\n")
-        file.write(f"TIME:\t{elapsed_time}\n")
 
 if __name__ == "__main__":
     main()
@@ -6,177 +6,541 @@ Version: 1.0
 Description: Convert numbers to binary and hex.
 """
 
+import argparse
+import functools
+import operator
 import sys
 import time
 
-def read_data(file_path):
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+CHUNK_SIZE = 1 << 16
+
+
+def read_lines(file_path, chunk_size=CHUNK_SIZE):
     """
-    Read data from a file and return a list of values.
+    Read a file lazily in chunks of raw lines, so memory stays bounded by the
+    chunk size whatever the size of the file.
 
     Args:
         file_path (str): The path to the file.
+        chunk_size (int): The number of lines per chunk.
 
-    Returns:
-        tuple: A tuple containing the list of values and the number of lines read.
+    Yields:
+        list: The lines of a chunk, as read.
 
     Raises:
         FileNotFoundError: If the file does not exist.
     """
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            while True:
+                lines = list(islice(file, chunk_size))
+                if not lines:
+                    return
+                yield lines
+    except FileNotFoundError:
+        print("Error: File does not exist.")
+        sys.exit(1)
+
+
+def parse_lines(lines):
+    """
+    Parse a chunk of raw lines, skipping blank lines.
 
+    Args:
+        lines (list): The lines to parse.
+
+    Returns:
+        tuple: The list of values, the number of non-blank lines (values and
+        lines that are not numbers) and a list of (line index, text) for the
+        lines that are not numbers.
+    """
     data = []
+    errors = []
     lines_read = 0
-    try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
+    for line in lines:
 
-                if not line.strip():
-                    continue
+        if not line.strip():
+            continue
 
-                try:
-                    value = int(line.strip())
-                    data.append(value)
-                except ValueError:
-                    print(f"Error in line {lines_read+1}: {line.strip()} is not a number.")
+        try:
+            value = int(line.strip())
+            data.append(value)
+        except ValueError:
+            errors.append((lines_read, line.strip()))
 
-                lines_read += 1
+        lines_read += 1
+    return data, lines_read, errors
 
-    except FileNotFoundError:
-        print("Error: File does not exist.")
-        sys.exit(1)
-    return data, lines_read
 
+# Excel's DEC2BIN pads negatives to 10 bits and DEC2HEX to 40 bits
+DEFAULT_BIN_WIDTH = 10
+DEFAULT_HEX_WIDTH = 40
 
-def _ones_complement(binary_number):
+
+def _twos_complement(number, width):
     """
-    Takes a binary number as input and returns its one's complement.
+    Bit pattern of a number in two's complement, as a non-negative integer.
 
     Parameters:
-    binary_number (str): The binary number to find the one's complement of.
+    number (int): The number to encode.
+    width (int): The number of bits kept.
 
     Returns:
-    str: The one's complement of the binary number.
+    int: The lowest ``width`` bits of the number.
     """
-    ones_complement = ""
-    for bit in binary_number:
-        if bit == "0":
-            ones_complement += "1"
-        else:
-            ones_complement += "0"
+    return number & ((1 << width) - 1)
+
+
+def _signed_bit_length(number):
+    """
+    Number of bits of a negative number in two's complement, sign bit
+    included, e.g. 10 for -512 and 11 for -513.
+    """
+    return (~number).bit_length() + 1
 
-    return ones_complement
 
-def _twos_complement(ones_complement):
+def _check_width(number, width):
     """
-    Calculates the two's complement of a binary number represented as a string.
+    Check that a number fits in ``width`` bits, either as a signed
+    (two's complement) or as an unsigned value.
 
     Args:
-        ones_complement (str): The binary number in ones' complement representation.
+        number (int): The number to check.
+        width (int): The number of bits.
 
-    Returns:
-        str: The two's complement of the input binary number.
-    """
-    twos_complement = ""
-    carry = 1
-    for bit in ones_complement[::-1]:
-        if carry == 1:
-            if bit == "0":
-                twos_complement = "1" + twos_complement
-                carry = 0
-            else:
-                twos_complement = "0" + twos_complement
-                carry = 1
-        else:
-            twos_complement = bit + twos_complement
+    Raises:
+        ValueError: If the number does not fit.
+    """
+    if not -(1 << (width - 1)) <= number < 1 << width:
+        raise ValueError(f"{number} does not fit in {width} bits")
 
-    return twos_complement
 
-def to_binary(number):
+def to_binary(number, width=None):
     """
     Converts a decimal number to its binary representation.
 
+    Without a width, negative numbers are written in two's complement over
+    10 bits, like Excel's DEC2BIN, or as many as the number needs with its
+    sign bit, so the leading 1 always reads back as negative. With a
+    width, every number is zero-padded to exactly that many bits.
+
     Args:
         number (int): The decimal number to convert.
+        width (int): Optional number of bits, e.g. 8, 16, 32 or 64.
 
     Returns:
         str: The binary representation of the input number.
+
+    Raises:
+        ValueError: If the number does not fit in ``width`` bits.
     """
+    if width is not None:
+        _check_width(number, width)
+        return format(_twos_complement(number, width), f"0{width}b")
+    if number >= 0:
+        return format(number, "b")
+    width = max(DEFAULT_BIN_WIDTH, _signed_bit_length(number))
+    return format(_twos_complement(number, width), f"0{width}b")
 
-    if number == 0:
-        return "0"
 
-    is_negative = False
-    if number < 0:
-        is_negative = True
-        number = abs(number)
+def to_hex(number, width=None):
+    """
+    Converts a decimal number to its hexadecimal representation.
 
-    binary_conversion = ""
+    Without a width, negative numbers are written in two's complement over
+    40 bits (10 hex digits), like Excel's DEC2HEX, or as many whole digits as
+    the number needs with its sign bit. With a width, every number is
+    zero-padded to the digits of that many bits.
 
-    while number > 0:
-        remainder = number % 2
-        binary_conversion = str(remainder) + binary_conversion
-        number //= 2
+    Args:
+        number (int): The decimal number to be converted.
+        width (int): Optional number of bits, e.g. 8, 16, 32 or 64.
 
-    if is_negative:
+    Returns:
+        str: The hexadecimal representation of the input number.
+
+    Raises:
+        ValueError: If the number does not fit in ``width`` bits.
+    """
+    if width is not None:
+        _check_width(number, width)
+        return format(_twos_complement(number, width), f"0{-(-width // 4)}X")
+    if number >= 0:
+        return format(number, "X")
+    width = max(DEFAULT_HEX_WIDTH, -(-_signed_bit_length(number) // 4) * 4)
+    return format(_twos_complement(number, width), "X")
 
-        # pad zeros to make 10 bits
-        while len(binary_conversion) < 10:
-            binary_conversion = "0" + binary_conversion
 
-        ones_complement = _ones_complement(binary_conversion)
-        twos_complement = _twos_complement(ones_complement)
+def convert(number, width=None):
+    """
+    Binary and hexadecimal representations of a number.
 
-        binary_conversion = twos_complement
+    Args:
+        number (int): The decimal number to convert.
+        width (int): Optional number of bits.
 
-    return binary_conversion
+    Returns:
+        tuple: The binary and hexadecimal strings, both "#NUM!" (as in Excel)
+        if the number does not fit in ``width`` bits.
+    """
+    try:
+        return to_binary(number, width), to_hex(number, width)
+    except ValueError:
+        return "#NUM!", "#NUM!"
 
 
-def to_hex(number):
+def cached_converter(maxsize):
     """
-    Converts a decimal number to its hexadecimal representation.
+    ``convert`` behind a bounded LRU cache keyed by (number, width), for
+    inputs dominated by a few repeated values.
 
     Args:
-        number (int): The decimal number to be converted.
+        maxsize (int): The number of conversions kept.
 
     Returns:
-        str: The hexadecimal representation of the input number.
+        function: The cached ``convert``; its ``cache_info()`` reports the
+        hits and misses.
+    """
+    return functools.lru_cache(maxsize=maxsize)(convert)
+
+
+def render_rows(values, width=None, use_numpy=False, converter=convert):
+    """
+    Convert a chunk of numbers and render every row once, without its
+    running NUMBER index so chunks can be rendered independently.
+
+    Args:
+        values (list): The numbers to convert.
+        width (int): Optional number of bits for both representations.
+        use_numpy (bool): Convert the chunk with the vectorized NumPy path.
+        converter (function): Converts one number, e.g. a ``cached_converter``.
+
+    Returns:
+        list: The rows, each starting with a tab and newline terminated.
+    """
+    return [
+        f"\t{number}\t{binary}\t{hexadecimal}\n"
+        for number, (binary, hexadecimal) in zip(values, convert_batch(values, width, use_numpy, converter))
+    ]
+
+
+# converter of the current process, set up by _init_converter
+_converter = convert
+
+
+def _init_converter(cache_size):
+    """
+    Set up the converter of the current process: ``convert`` behind an LRU
+    cache of ``cache_size`` entries, or plain ``convert`` if it is 0.
+    """
+    global _converter  # pylint: disable=global-statement
+    _converter = cached_converter(cache_size) if cache_size else convert
+
+
+def _cache_counts():
+    """Hits and misses of the current process's converter so far."""
+    if not hasattr(_converter, "cache_info"):
+        return 0, 0
+    cache_info = _converter.cache_info()
+    return cache_info.hits, cache_info.misses
+
+
+def _convert_lines(lines, width=None, use_numpy=False):
+    """
+    Parse, convert and render a chunk of raw lines with the converter of the
+    current process: the unit of work of both the serial and the parallel
+    path, so both write exactly the same output.
+
+    Returns:
+        tuple: The rows without their index (see ``render_rows``), the number
+        of non-blank lines, the (line index, text) of the lines that are not
+        numbers, and the cache hits and misses of the chunk.
+    """
+    hits, misses = _cache_counts()
+    values, lines_read, errors = parse_lines(lines)
+    rows = render_rows(values, width, use_numpy, _converter)
+    new_hits, new_misses = _cache_counts()
+    return rows, lines_read, errors, new_hits - hits, new_misses - misses
+
+
+def _ordered_map(executor, function, iterable, window):
+    """
+    Like ``executor.map``, but with at most ``window`` calls in flight, so the
+    input is only read as fast as the results are consumed.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def convert_file(file_path, width=None, use_numpy=False, cache_size=0, workers=1):
+    """
+    Convert a file chunk by chunk, in this process or in a pool of worker
+    processes, yielding the results in file order.
+
+    Args:
+        file_path (str): The path to the file.
+        width (int): Optional number of bits for both representations.
+        use_numpy (bool): Convert every chunk with the vectorized NumPy path.
+        cache_size (int): Entries of the LRU cache of every process, 0 for none.
+        workers (int): Number of worker processes.
+
+    Yields:
+        tuple: The results of every chunk, as returned by ``_convert_lines``.
+    """
+    convert_chunk = functools.partial(_convert_lines, width=width, use_numpy=use_numpy)
+    if workers == 1:
+        _init_converter(cache_size)
+        yield from map(convert_chunk, read_lines(file_path))
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_converter, initargs=(cache_size,)) as executor:
+        yield from _ordered_map(executor, convert_chunk, read_lines(file_path), 2 * workers)
+
+
+def convert_and_print(results):
+    """
+    Prints the converted numbers along with their decimal values.
+
+    The results are consumed as they are produced: the errors of every chunk
+    are printed with their line numbers, then its rows get their running
+    NUMBER index and are written to stdout and to conversion_results.txt
+    with ``writelines``, so the first rows appear right away and memory does
+    not grow with the input. Nothing is written if there are no lines at all.
+
+    Args:
+        results (iterable): The results of every chunk in file order, as
+            yielded by ``convert_file``.
+
+    Returns:
+        tuple: The number of lines read, and the cache hits and misses.
+    """
+    lines_read = rows_written = hits = misses = 0
+    with ExitStack() as stack:
+        file = None
+        for rows, lines, errors, chunk_hits, chunk_misses in results:
+            for index, text in errors:
+                print(f"Error in line {lines_read+index+1}: {text} is not a number.")
+            lines_read += lines
+            hits += chunk_hits
+            misses += chunk_misses
+            if file is None:
+                if not lines:
+                    continue
+                file = stack.enter_context(open("conversion_results.txt", "w", encoding="utf-8"))
+                file.write("NUMBER\tDEC\tBIN\tHEX\n")
+                sys.stdout.write("NUMBER\tDEC\tBIN\tHEX\n")
+
+            indexes = map(str, range(rows_written + 1, rows_written + len(rows) + 1))
+            rows = list(map(operator.add, indexes, rows))
+            sys.stdout.writelines(rows)
+            file.writelines(rows)
+            rows_written += len(rows)
+    return lines_read, hits, misses
+
+
+if np is not None:
+    # ASCII digits of every byte value: 8 binary digits and 2 hex digits
+    BIN_TABLE = np.array([list(format(byte, "08b").encode()) for byte in range(256)], dtype=np.uint8)
+    HEX_TABLE = np.array([list(format(byte, "02X").encode()) for byte in range(256)], dtype=np.uint8)
+
+
+def _np_bit_length(magnitude):
+    """
+    ``int.bit_length`` of every element of a uint64 array, by binary search
+    on the shift.
     """
-    if number == 0:
-        return "0"
+    lengths = np.zeros(len(magnitude), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = magnitude >> np.uint64(shift)
+        has_high = high != 0
+        lengths += has_high * shift
+        magnitude = np.where(has_high, high, magnitude)
+    return lengths + (magnitude != 0)
 
-    hex_conversion = ""
-    if number < 0:
-        number = abs(number) ^ 0xFFFFFFFFFF
-        number += 1
 
-    while number > 0:
-        remainder = number % 16
-        if remainder < 10:
-            hex_conversion = str(remainder) + hex_conversion
+def _np_digits(digits, lengths):
+    """
+    Strings made of the last ``lengths[i]`` ASCII digits of every row of a
+    digit matrix.
+
+    A newline column is appended and the kept digits of all the rows are
+    gathered with one boolean mask, so the strings come out of a single
+    decode and split instead of a Python-level loop over the rows.
+    """
+    rows, columns = digits.shape
+    lines = np.empty((rows, columns + 1), dtype=np.uint8)
+    lines[:, :columns] = digits
+    lines[:, columns] = ord("\n")
+    keep = np.arange(columns + 1) >= (columns - lengths)[:, None]
+    return lines[keep].tobytes().decode("ascii").split("\n")[:-1]
+
+
+def _np_convert_batch(numbers, width):
+    """
+    Vectorized ``convert_batch`` of an int64 array: the two's complement bit
+    pattern of every number is split into bytes and assembled from the
+    byte-to-digits lookup tables.
+    """
+    patterns = numbers.astype(np.uint64)
+    if width is not None and width < 64:
+        patterns &= np.uint64((1 << width) - 1)
+    octets = patterns.astype(">u8").view(np.uint8).reshape(-1, 8)
+    binary_digits = BIN_TABLE[octets].reshape(-1, 64)
+    hex_digits = HEX_TABLE[octets].reshape(-1, 16)
+
+    negative = numbers < 0
+    if width is not None:
+        binary_lengths = np.full(len(numbers), width)
+        hex_lengths = np.full(len(numbers), -(-width // 4))
+    else:
+        # same defaults as to_binary and to_hex: the bits of a negative number
+        # are those of its complement plus the sign bit
+        bits = _np_bit_length(np.where(negative, ~patterns, patterns)) + negative
+        binary_lengths = np.maximum(bits, np.where(negative, DEFAULT_BIN_WIDTH, 1))
+        hex_lengths = np.maximum(-(-bits // 4), np.where(negative, DEFAULT_HEX_WIDTH // 4, 1))
+    binaries = _np_digits(binary_digits, binary_lengths)
+    hexes = _np_digits(hex_digits, hex_lengths)
+
+    if width is not None:
+        fits = numbers >= -(1 << (width - 1))
+        if width < 63:
+            fits &= numbers < 1 << width
+        for index in np.flatnonzero(~fits).tolist():
+            binaries[index] = hexes[index] = "#NUM!"
+    return list(zip(binaries, hexes))
+
+
+def convert_batch(numbers, width=None, use_numpy=False, converter=convert):
+    """
+    Convert a chunk of numbers at once.
+
+    With ``use_numpy`` the chunk is converted in vectorized form when it
+    fits in int64 and the width is at most 64 bits; otherwise (or without
+    NumPy) every number goes through ``converter``. Both paths give the same
+    strings.
+
+    Args:
+        numbers (list): The numbers to convert.
+        width (int): Optional number of bits.
+        use_numpy (bool): Use the vectorized NumPy path when possible.
+        converter (function): Converts one number, e.g. a ``cached_converter``.
+
+    Returns:
+        list: (binary, hexadecimal) pairs, in the same order as ``numbers``.
+    """
+    if use_numpy and np is not None and numbers and (width is None or width <= 64):
+        try:
+            values = np.array(numbers, dtype=np.int64)
+        except OverflowError:
+            pass
         else:
-            hex_conversion = chr(remainder + 55) + hex_conversion
-        number //= 16
+            return _np_convert_batch(values, width)
+    return [converter(number, width) for number in numbers]
 
-    return hex_conversion
 
+def parse_width(text):
+    """
+    Parse a --width value: a positive number of bits.
+
+    Args:
+        text (str): The option value.
+
+    Returns:
+        int: The number of bits.
 
-def convert_and_print(data):
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        width = int(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid width: {text}") from error
+    if width < 1:
+        raise argparse.ArgumentTypeError("width must be positive")
+    return width
+
+
+def parse_cache_size(text):
     """
-    Converts the given list of numbers to binary and hexadecimal representations,
-    and prints the results along with their decimal values.
+    Parse a --cache-size value: a number of entries, 0 to disable the cache.
 
     Args:
-        data (list): A list of numbers to be converted and printed.
+        text (str): The option value.
 
     Returns:
-        None
+        int: The number of entries.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a non-negative integer.
     """
+    try:
+        size = int(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid cache size: {text}") from error
+    if size < 0:
+        raise argparse.ArgumentTypeError("cache size must not be negative")
+    return size
 
-    with open("conversion_results.txt", "w", encoding="utf-8") as file:
-        file.write("NUMBER\tDEC\tBIN\tHEX\n")
-        print("NUMBER\tDEC\tBIN\tHEX")
-        for i, number in enumerate(data):
-            print(f"{i+1}\t{number}\t{to_binary(number)}\t{to_hex(number)}")
-            file.write(f"{i+1}\t{number}\t{to_binary(number)}\t{to_hex(number)}\n")
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+
+    Args:
+        argv (list): The arguments, defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="convert_numbers.py",
+        description="Convert numbers to binary and hex.",
+    )
+    parser.add_argument("file_path", help="file with one integer per line")
+    parser.add_argument(
+        "--width",
+        type=parse_width,
+        metavar="BITS",
+        help="write every number in two's complement over BITS bits, e.g. 8, 16, 32 or 64 "
+             "(default: Excel's 10-bit BIN and 40-bit HEX for negatives)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=parse_cache_size,
+        default=4096,
+        metavar="N",
+        help="keep the last N distinct conversions in an LRU cache, 0 to disable (default: 4096)",
+    )
+    parser.add_argument(
+        "--numpy",
+        action="store_true",
+        help="convert the numbers in vectorized chunks with NumPy (pure Python if not installed)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="convert the file in N worker processes (default: 1)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
 
 
 def main():
@@ -185,25 +549,34 @@ def main():
     Reads a file, converts the numbers in the file, and prints the converted numbers.
     Calculates and prints the elapsed time for the conversion process.
     Appends the elapsed time to a file named "ConversionResults.txt".
+
+    Usage: python convert_numbers.py <file_path> [--width BITS] [--cache-size N] [--numpy] [--workers N]
     """
-    if len(sys.argv) != 2:
-        print("Usage: python convert_numbers.py <file_path>")
-        sys.exit(1)
+    args = parse_args()
+    if args.numpy and np is None:
+        print("Warning: NumPy is not installed, using the pure-Python functions.")
+        args.numpy = False
 
     start = time.time()
-    file_path = sys.argv[1]
+    file_path = args.file_path
 
 
-    data, lines_read = read_data(file_path)
+    lines_read, hits, misses = convert_and_print(
+        convert_file(file_path, args.width, args.numpy, args.cache_size, args.workers)
+    )
     if lines_read > 0:
-        convert_and_print(data)
         end = time.time()
         elapsed_time = end - start
 
-        print(f"TIME:\t{elapsed_time}")
+        summary = [f"TIME:\t{elapsed_time}"]
+        # the NumPy path only goes through the cache for numbers outside int64
+        if hits + misses:
+            summary.append(f"CACHE HITS:\t{hits}")
+            summary.append(f"CACHE MISSES:\t{misses}")
+        print("\n".join(summary))
 
         with open("conversion_results.txt", "a", encoding="utf-8") as file:
-            file.write(f"TIME:\t{elapsed_time}\n")
+            file.write("\n".join(summary) + "\n")
 
     else:
         print("No data found.")
@@ -0,0 +1,446 @@
+"""
+Compute statistics test module
+"""
+
+import bisect
+import math
+import os
+import random
+import statistics
+import tempfile
+import threading
+import unittest
+from collections import Counter
+
+from compute_statistics import (
+    HeavyHitters,
+    KLLSketch,
+    RunningStats,
+    SortedSkiplist,
+    WindowStats,
+    external_median,
+    external_percentiles,
+    last_line_end,
+    modes,
+    np,
+    percentiles,
+    read_data,
+    top_k,
+)
+
+
+class TestReadData(unittest.TestCase):
+    """
+    TestReadData class Test cases for the read_data function
+    """
+
+    def test_pipe(self):
+        """
+        Test that a FIFO is read in buffered blocks like a regular file
+        """
+        text = "".join(f"{value}\n" for value in range(5000)) + "\nbad\n7"
+        with tempfile.TemporaryDirectory() as work:
+            regular = os.path.join(work, "data.txt")
+            with open(regular, "w", encoding="utf-8") as file:
+                file.write(text)
+            fifo = os.path.join(work, "fifo")
+            os.mkfifo(fifo)
+
+            def write():
+                with open(fifo, "w", encoding="utf-8") as file:
+                    file.write(text)
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            piped = read_data(fifo, verbose=False, workers=2, block_size=7)
+            writer.join()
+            self.assertEqual(piped, read_data(regular, verbose=False))
+            self.assertEqual(len(piped[0]), 5001)
+
+    def test_last_line_end(self):
+        """
+        Test that a partly written last line is left out
+        """
+        with tempfile.TemporaryDirectory() as work:
+            path = os.path.join(work, "data.txt")
+            with open(path, "wb") as file:
+                file.write(b"1\n22\n" + b"3" * 100000)
+            self.assertEqual(last_line_end(path, 0, 100005), 5)
+            self.assertEqual(last_line_end(path, 0, 5), 5)
+            self.assertEqual(last_line_end(path, 0, 4), 2)
+            self.assertEqual(last_line_end(path, 5, 100005), 5)
+
+
+class TestSortedSkiplist(unittest.TestCase):
+    """
+    TestSortedSkiplist class Test cases for the SortedSkiplist class
+    """
+
+    def test_insert(self):
+        """
+        Test the insert method and lookup by rank against sorted()
+        """
+        rng = random.Random(1)
+        skiplist = SortedSkiplist(64)
+        values = []
+        for _ in range(500):
+            # few distinct values, so duplicates are common
+            value = float(rng.randint(-20, 20))
+            skiplist.insert(value)
+            values.append(value)
+            self.assertEqual(len(skiplist), len(values))
+        self.assertEqual([skiplist[rank] for rank in range(len(skiplist))], sorted(values))
+
+    def test_remove(self):
+        """
+        Test the remove method against sorted()
+        """
+        rng = random.Random(2)
+        skiplist = SortedSkiplist(16)
+        values = []
+        for _ in range(2000):
+            if values and rng.random() < 0.45:
+                value = values.pop(rng.randrange(len(values)))
+                skiplist.remove(value)
+            else:
+                value = rng.choice([rng.gauss(0, 1), float(rng.randint(0, 5))])
+                skiplist.insert(value)
+                values.append(value)
+            expected = sorted(values)
+            self.assertEqual(len(skiplist), len(expected))
+            for rank in {0, len(expected) // 2, len(expected) - 1} if expected else ():
+                self.assertEqual(skiplist[rank], expected[rank])
+        self.assertEqual([skiplist[rank] for rank in range(len(skiplist))], sorted(values))
+
+    def test_remove_missing(self):
+        """
+        Test the remove method with a value that is not in the skiplist
+        """
+        skiplist = SortedSkiplist()
+        skiplist.insert(1.0)
+        with self.assertRaises(KeyError):
+            skiplist.remove(2.0)
+        self.assertEqual(len(skiplist), 1)
+
+    def test_getitem_out_of_range(self):
+        """
+        Test the __getitem__ method with ranks out of range
+        """
+        skiplist = SortedSkiplist()
+        with self.assertRaises(IndexError):
+            _ = skiplist[0]
+        skiplist.insert(3.0)
+        self.assertEqual(skiplist[0], 3.0)
+        with self.assertRaises(IndexError):
+            _ = skiplist[1]
+        with self.assertRaises(IndexError):
+            _ = skiplist[-1]
+
+
+class TestWindowStats(unittest.TestCase):
+    """
+    TestWindowStats class Test cases for the WindowStats class
+    """
+
+    def assert_window(self, window, values):
+        """
+        Check the statistics of a window against the statistics module
+        """
+        self.assertEqual(window.count, len(values))
+        self.assertEqual([value for _, value in window.window], values)
+        self.assertAlmostEqual(window.mean, statistics.fmean(values), places=9)
+        self.assertEqual(window.median(), statistics.median(values))
+        self.assertEqual(window.percentiles([0, 10, 25, 90, 100]), percentiles(values, [0, 10, 25, 90, 100]))
+        if len(values) > 1:
+            self.assertAlmostEqual(window.m2 / (window.count - 1), statistics.variance(values), places=9)
+
+    def test_size_eviction(self):
+        """
+        Test that a window of a given size keeps the last values
+        """
+        rng = random.Random(3)
+        window = WindowStats(size=50)
+        values = []
+        for now in range(400):
+            value = float(rng.randint(0, 30))
+            window.update(value, now)
+            values.append(value)
+            self.assert_window(window, values[-50:])
+
+    def test_time_eviction(self):
+        """
+        Test that a time window keeps the values of the last seconds
+        """
+        rng = random.Random(4)
+        window = WindowStats(seconds=10)
+        arrivals = []
+        now = 0.0
+        for _ in range(300):
+            now += rng.choice([0.0, 0.5, 1.0, 3.0])
+            value = rng.gauss(100, 15)
+            window.update(value, now)
+            arrivals.append((now, value))
+            self.assert_window(window, [value for time, value in arrivals if time > now - 10])
+
+        window.expire(now + 10)
+        self.assertEqual(window.count, 0)
+        self.assertEqual(window.results(), [("COUNT", 0)])
+
+    def test_results(self):
+        """
+        Test the results method: modes, top values and dispersion
+        """
+        window = WindowStats(size=4)
+        for now, value in enumerate([9.0, 1.0, 2.0, 2.0, 3.0, 3.0]):
+            window.update(value, now)
+        results = dict(window.results([50], k=2))
+        self.assertEqual(results["COUNT"], 4)
+        self.assertEqual(results["MEDIAN"], 2.5)
+        self.assertEqual(results["P50"], 2.5)
+        self.assertEqual(results["MODE"], 2.0)
+        self.assertEqual(results["MODE COUNT"], 2)
+        self.assertEqual(results["MODE TIES"], "2.0, 3.0")
+        self.assertEqual(results["TOP1"], "2.0\t2")
+        self.assertEqual(results["TOP2"], "3.0\t2")
+        self.assertAlmostEqual(results["VAR"], statistics.variance([2.0, 2.0, 3.0, 3.0]))
+        self.assertAlmostEqual(results["SD"], statistics.pstdev([2.0, 2.0, 3.0, 3.0]))
+
+
+class TestKLLSketch(unittest.TestCase):
+    """
+    TestKLLSketch class Test cases for the KLLSketch class
+    """
+
+    def assert_ranks(self, sketch, values):
+        """
+        Check that the rank of every sketch quantile is within the sketch's
+        rank error of the requested one
+        """
+        ordered = sorted(values)
+        n = len(ordered)
+        percents = [1, 10, 25, 50, 75, 90, 99]
+        for percent, value in zip(percents, sketch.quantiles(percents)):
+            low = bisect.bisect_left(ordered, value) / n
+            high = bisect.bisect_right(ordered, value) / n
+            target = percent / 100
+            error = max(low - target, target - high, 0)
+            self.assertLessEqual(error, sketch.rank_error, f"P{percent}")
+
+    def test_exact_while_small(self):
+        """
+        Test that the sketch is exact until it compacts
+        """
+        values = [float(value) for value in range(100, 0, -1)]
+        sketch = KLLSketch(k=200)
+        sketch.update_many(values)
+        self.assertEqual(sketch.rank_error, 0.0)
+        self.assertEqual(sketch.median(), statistics.median(values))
+        self.assertEqual(sketch.quantiles([10, 90]), percentiles(values, [10, 90]))
+
+    def test_rank_error(self):
+        """
+        Test the rank error and the bounded size of a compacted sketch
+        """
+        rng = random.Random(5)
+        values = [rng.lognormvariate(0, 1) for _ in range(100000)]
+        sketch = KLLSketch.for_error(0.01)
+        sketch.update_many(values)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sketch.size, 4 * sketch.k)
+        self.assertEqual(sketch.quantiles([0, 100]), [min(values), max(values)])
+        self.assert_ranks(sketch, values)
+
+    def test_merge(self):
+        """
+        Test the merge method over disjoint parts of the data
+        """
+        rng = random.Random(6)
+        values = [rng.gauss(0, 1) for _ in range(60000)]
+        merged = KLLSketch.for_error(0.01)
+        for start in range(0, len(values), 20000):
+            part = merged.fresh()
+            part.update_many(values[start:start + 20000])
+            merged.merge(part)
+        self.assertEqual(merged.count, len(values))
+        self.assertEqual((merged.minimum, merged.maximum), (min(values), max(values)))
+        self.assert_ranks(merged, values)
+
+    def test_merge_other_k(self):
+        """
+        Test that a sketch with another k is not merged
+        """
+        sketch = KLLSketch(k=64)
+        sketch.update_many([1.0, 2.0])
+        other = KLLSketch(k=128)
+        other.update_many([3.0])
+        with self.assertRaises(ValueError):
+            sketch.merge(other)
+        self.assertEqual(sketch.count, 2)
+
+    def test_to_dict(self):
+        """
+        Test that to_dict and from_dict keep the answers of the sketch
+        """
+        rng = random.Random(7)
+        sketch = KLLSketch(k=64)
+        sketch.update_many([rng.random() for _ in range(5000)])
+        restored = KLLSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.count, sketch.count)
+        self.assertEqual(restored.quantiles([5, 50, 95]), sketch.quantiles([5, 50, 95]))
+
+
+class TestHeavyHitters(unittest.TestCase):
+    """
+    TestHeavyHitters class Test cases for the HeavyHitters class and the
+    modes and top_k functions
+    """
+
+    def setUp(self) -> None:
+        rng = random.Random(9)
+        weights = [1 / rank for rank in range(1, 501)]
+        self.data = [float(value) for value in rng.choices(range(500), weights, k=20000)]
+        self.expected = Counter(self.data)
+        return super().setUp()
+
+    def summarize(self, data, capacity, block=1000):
+        """
+        Count the data into a summary a block at a time
+        """
+        summary = HeavyHitters(capacity)
+        for start in range(0, len(data), block):
+            summary.update_many(data[start:start + block])
+        return summary
+
+    def assert_bounds(self, summary):
+        """
+        Check that every count is within error below the true count
+        """
+        self.assertLessEqual(summary.error, len(self.data) / (summary.capacity + 1))
+        for value, count in self.expected.items():
+            reported = summary.counts.get(value, 0)
+            self.assertLessEqual(reported, count, value)
+            self.assertGreaterEqual(reported, count - summary.error, value)
+
+    def test_bounds(self):
+        """
+        Test the error bound of a single summary
+        """
+        summary = self.summarize(self.data, 32)
+        self.assertGreater(summary.error, 0)
+        self.assert_bounds(summary)
+
+    def test_merge(self):
+        """
+        Test the error bound of merged summaries
+        """
+        merged = self.summarize(self.data[:7000], 32)
+        merged.merge(self.summarize(self.data[7000:12000], 32))
+        merged.merge(self.summarize(self.data[12000:], 32))
+        self.assert_bounds(merged)
+        self.assertEqual(merged.top(1)[0][0], self.expected.most_common(1)[0][0])
+
+    def test_exact(self):
+        """
+        Test that a summary that never overflows is exact, ties included
+        """
+        summary = self.summarize(self.data, 1000)
+        self.assertEqual(summary.error, 0)
+        self.assertEqual(summary.modes(), modes(self.data))
+        self.assertEqual(summary.top(50), top_k(self.data, 50))
+
+    def test_to_dict(self):
+        """
+        Test the to_dict and from_dict methods
+        """
+        summary = self.summarize(self.data, 32)
+        restored = HeavyHitters.from_dict(summary.to_dict())
+        self.assertEqual(restored.to_dict(), summary.to_dict())
+
+    def test_tie_order(self):
+        """
+        Test that modes and top_k break ties by first appearance
+        """
+        data = [3.0, 1.0, 2.0, 1.0, 3.0, 5.0, 2.0, 4.0, 4.0]
+        self.assertEqual(modes(data), (2, [3.0, 1.0, 2.0, 4.0]))
+        self.assertEqual(top_k(data, 3), [(3.0, 2), (1.0, 2), (2.0, 2)])
+        self.assertEqual(top_k(data, 6), [(3.0, 2), (1.0, 2), (2.0, 2), (4.0, 2), (5.0, 1)])
+        summary = self.summarize(data, 10, block=2)
+        self.assertEqual(summary.modes(), modes(data))
+        self.assertEqual(summary.top(6), top_k(data, 6))
+        if np is not None:
+            array_data = np.array(data)
+            self.assertEqual(modes(array_data), modes(data))
+            self.assertEqual(top_k(array_data, 6), top_k(data, 6))
+
+
+class TestExternalSelect(unittest.TestCase):
+    """
+    TestExternalSelect class Test cases for the out-of-core median and
+    percentiles
+    """
+
+    def setUp(self) -> None:
+        self.work = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.work.name, "data.txt")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.work.cleanup()
+        return super().tearDown()
+
+    def select(self, values, memory_budget, percents=(10, 50, 90)):
+        """
+        Write the values to a file and select their median and percentiles
+        out of core
+        """
+        with open(self.data_file, "w", encoding="utf-8") as file:
+            file.writelines(f"{value!r}\n" for value in values)
+        stats = RunningStats()
+        read_data(self.data_file, (stats,), keep_values=False, verbose=False)
+        median_value, passes = external_median(self.data_file, stats, memory_budget, self.work.name)
+        percentile_values, _ = external_percentiles(
+            self.data_file, stats, list(percents), memory_budget, self.work.name
+        )
+        return median_value, percentile_values, passes
+
+    def test_spilled_passes(self):
+        """
+        Test a budget small enough to need several spilled passes
+        """
+        rng = random.Random(8)
+        values = [rng.gauss(0, 1) for _ in range(20001)]
+        median_value, percentile_values, passes = self.select(values, 1024)
+        self.assertGreater(passes, 1)
+        self.assertEqual(median_value, statistics.median(values))
+        self.assertEqual(percentile_values, percentiles(values, [10, 50, 90]))
+        self.assertEqual(os.listdir(self.work.name), ["data.txt"])
+
+    def test_duplicates(self):
+        """
+        Test data with few distinct values and an even count
+        """
+        rng = random.Random(9)
+        for budget in (16, 128, 1 << 20):
+            values = [float(rng.randint(0, 3)) for _ in range(2000)]
+            median_value, percentile_values, _ = self.select(values, budget)
+            self.assertEqual(median_value, statistics.median(values))
+            self.assertEqual(percentile_values, percentiles(values, [10, 50, 90]))
+
+    def test_infinities(self):
+        """
+        Test data with infinities, including ranks that fall on them
+        """
+        rng = random.Random(10)
+        for budget in (16, 1024):
+            for trial in range(20):
+                values = [rng.gauss(0, 1) for _ in range(rng.randint(1, 300))]
+                values += [math.inf] * rng.randint(0, 200) + [-math.inf] * rng.randint(0, 200)
+                rng.shuffle(values)
+                percents = (0, 10, 50, 90, 100)
+                median_value, percentile_values, _ = self.select(values, budget, percents)
+                self.assertEqual(median_value, statistics.median(values), trial)
+                self.assertEqual(percentile_values, percentiles(values, percents), trial)
+
+
+if __name__ == "__main__":
+    unittest.main()
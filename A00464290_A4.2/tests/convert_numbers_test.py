@@ -0,0 +1,185 @@
+"""
+Convert numbers test module
+"""
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from convert_numbers import (
+    CHUNK_SIZE,
+    convert,
+    convert_and_print,
+    convert_batch,
+    convert_file,
+    np,
+    to_binary,
+    to_hex,
+)
+
+
+class TestConvert(unittest.TestCase):
+    """
+    TestConvert class Test cases for the to_binary, to_hex and convert
+    functions
+    """
+
+    def test_positive(self):
+        """
+        Test that positive numbers are written with the digits they need
+        """
+        self.assertEqual(convert(0), ("0", "0"))
+        self.assertEqual(convert(10), ("1010", "A"))
+        self.assertEqual(convert(2 ** 70), ("1" + "0" * 70, "4" + "0" * 17))
+
+    def test_negative_binary(self):
+        """
+        Test the default binary width of negatives on both sides of 10 bits
+        """
+        self.assertEqual(to_binary(-1), "1111111111")
+        self.assertEqual(to_binary(-512), "1000000000")
+        self.assertEqual(to_binary(-513), "10111111111")
+        self.assertEqual(to_binary(-1025), "101111111111")
+        for number in (-1, -512, -513, -1025, -(2 ** 70) - 3):
+            digits = to_binary(number)
+            self.assertEqual(digits[0], "1")
+            self.assertEqual(int(digits, 2) - (1 << len(digits)), number)
+
+    def test_negative_hex(self):
+        """
+        Test the default hexadecimal width of negatives on both sides of 40 bits
+        """
+        self.assertEqual(to_hex(-1), "FFFFFFFFFF")
+        self.assertEqual(to_hex(-(2 ** 39)), "8000000000")
+        self.assertEqual(to_hex(-(2 ** 39) - 1), "F7FFFFFFFFF")
+        self.assertEqual(to_hex(-(2 ** 43)), "80000000000")
+        for number in (-1, -(2 ** 39), -(2 ** 39) - 1, -(2 ** 70) - 3):
+            digits = to_hex(number)
+            self.assertGreaterEqual(int(digits[0], 16), 8)
+            self.assertEqual(int(digits, 16) - (1 << 4 * len(digits)), number)
+
+    def test_width(self):
+        """
+        Test numbers padded to a width of 1, 8, 12 and 64 bits
+        """
+        self.assertEqual(convert(0, 1), ("0", "0"))
+        self.assertEqual(convert(1, 1), ("1", "1"))
+        self.assertEqual(convert(-1, 1), ("1", "1"))
+        self.assertEqual(convert(5, 8), ("00000101", "05"))
+        self.assertEqual(convert(255, 8), ("11111111", "FF"))
+        self.assertEqual(convert(-128, 8), ("10000000", "80"))
+        self.assertEqual(convert(-1, 12), ("111111111111", "FFF"))
+        self.assertEqual(convert(4095, 12), ("111111111111", "FFF"))
+        self.assertEqual(convert(-2048, 12), ("100000000000", "800"))
+        self.assertEqual(convert(-1, 64), ("1" * 64, "F" * 16))
+        self.assertEqual(convert(2 ** 64 - 1, 64), ("1" * 64, "F" * 16))
+        self.assertEqual(convert(-(2 ** 63), 64), ("1" + "0" * 63, "8" + "0" * 15))
+
+    def test_does_not_fit(self):
+        """
+        Test the #NUM! result of numbers that do not fit in the width
+        """
+        for number, width in ((2, 1), (-2, 1), (256, 8), (-129, 8), (4096, 12), (-2049, 12),
+                              (2 ** 64, 64), (-(2 ** 63) - 1, 64)):
+            with self.subTest(number=number, width=width):
+                self.assertEqual(convert(number, width), ("#NUM!", "#NUM!"))
+                with self.assertRaises(ValueError):
+                    to_binary(number, width)
+                with self.assertRaises(ValueError):
+                    to_hex(number, width)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestNumpyConvert(unittest.TestCase):
+    """
+    TestNumpyConvert class Test cases for the vectorized NumPy conversion
+    """
+
+    def setUp(self) -> None:
+        rng = random.Random(13)
+        edges = [0, 1, -1, 2, -2, 511, 512, -512, -513, 1023, -1024, -1025, 4095, 4096, -2048, -2049,
+                 2 ** 39 - 1, -(2 ** 39), -(2 ** 39) - 1, 2 ** 62, -(2 ** 62), 2 ** 63 - 1, -(2 ** 63),
+                 -(2 ** 63) + 1]
+        # random magnitudes, so every bit length is covered
+        randoms = [rng.randint(-(2 ** 63), 2 ** 63 - 1) >> rng.randint(0, 63) for _ in range(2000)]
+        self.numbers = edges + randoms
+        return super().setUp()
+
+    def test_same_as_convert(self):
+        """
+        Test that every width gives the same strings as the pure-Python convert
+        """
+        for width in (None, 1, 4, 8, 10, 12, 32, 40, 62, 63, 64):
+            with self.subTest(width=width):
+                self.assertEqual(
+                    convert_batch(self.numbers, width, use_numpy=True),
+                    [convert(number, width) for number in self.numbers],
+                )
+
+    def test_outside_int64(self):
+        """
+        Test that numbers outside int64 fall back to the pure-Python convert
+        """
+        numbers = [2 ** 63, -(2 ** 63) - 1, 5]
+        for width in (None, 8, 64, 65):
+            with self.subTest(width=width):
+                self.assertEqual(
+                    convert_batch(numbers, width, use_numpy=True),
+                    [convert(number, width) for number in numbers],
+                )
+
+
+class TestConvertFile(unittest.TestCase):
+    """
+    TestConvertFile class Test cases for the convert_file and
+    convert_and_print functions
+    """
+
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        self.work = tempfile.TemporaryDirectory()
+        # conversion_results.txt is written to the working directory
+        os.chdir(self.work.name)
+        rng = random.Random(16)
+        lines = []
+        # several chunks, with bad and blank lines in all of them
+        for index in range(2 * CHUNK_SIZE + 500):
+            if index % 997 == 0:
+                lines.append(f"bad{index}\n")
+            elif index % 1009 == 0:
+                lines.append("  \n")
+            else:
+                lines.append(f"{rng.randint(-5000, 5000)}\n")
+        with open("data.txt", "w", encoding="utf-8") as file:
+            file.writelines(lines)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.work.cleanup()
+        return super().tearDown()
+
+    def run_conversion(self, workers):
+        """
+        Convert the data file and return the printed text, the results file
+        and the line count
+        """
+        output = io.StringIO()
+        with redirect_stdout(output):
+            lines_read, _, _ = convert_and_print(convert_file("data.txt", cache_size=4096, workers=workers))
+        with open("conversion_results.txt", "r", encoding="utf-8") as file:
+            return output.getvalue(), file.read(), lines_read
+
+    def test_workers_same_as_serial(self):
+        """
+        Test that the parallel output is identical to the serial output
+        """
+        serial = self.run_conversion(1)
+        self.assertIn("Error in line 998: bad997 is not a number.", serial[0])
+        self.assertEqual(self.run_conversion(2), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,329 @@
+"""
+Word count test module
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+from word_count import ENTRY_BYTES, NgramCounter, SpaceSaving, SpillingCounter, WordSketch, last_line_end
+
+
+def zipf_blocks(seed, blocks=40, size=500, vocabulary=2000):
+    """
+    Blocks of words with a skewed (Zipf-like) frequency
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, vocabulary + 1)]
+    words = [f"w{index}" for index in range(vocabulary)]
+    return [rng.choices(words, weights, k=size) for _ in range(blocks)]
+
+
+class TestSpillingCounter(unittest.TestCase):
+    """
+    TestSpillingCounter class Test cases for the SpillingCounter class
+    """
+
+    def setUp(self) -> None:
+        rng = random.Random(21)
+        vocabulary = [f"w{index}" for index in range(300)]
+        # Skewed so there are both frequent words and many ties
+        self.blocks = [
+            [rng.choice(vocabulary[:rng.randint(1, 300)]) for _ in range(rng.randint(0, 50))]
+            for _ in range(80)
+        ]
+        self.expected = Counter()
+        for block in self.blocks:
+            self.expected.update(block)
+        return super().setUp()
+
+    def count(self, budget_words):
+        """
+        Count the blocks with a budget of the given number of words
+        """
+        counter = SpillingCounter(budget_words * ENTRY_BYTES)
+        self.addCleanup(counter.close)
+        for block in self.blocks:
+            counter.update(block)
+        return counter
+
+    def test_spill(self):
+        """
+        Test that exceeding the budget spills runs
+        """
+        counter = self.count(10)
+        self.assertGreater(len(counter.runs), 1)
+        self.assertLessEqual(len(counter.counts), 10)
+        self.assertTrue(all(os.path.exists(path) for path in counter.runs))
+
+    def test_merged(self):
+        """
+        Test the merged method
+        """
+        for budget_words in (1, 10, 1000):
+            merged = list(self.count(budget_words).merged())
+            self.assertEqual([word for word, _, _ in merged], sorted(self.expected))
+            self.assertEqual({word: count for word, count, _ in merged}, self.expected)
+            order = [word for word, _, _ in sorted(merged, key=lambda row: row[2])]
+            self.assertEqual(order, list(self.expected))
+
+    def test_most_common(self):
+        """
+        Test the most_common method, ties in order of first appearance
+        """
+        total = sum(self.expected.values())
+        for budget_words in (1, 10, 1000):
+            words, grand_total = self.count(budget_words).most_common()
+            self.assertEqual(list(words), self.expected.most_common())
+            self.assertEqual(grand_total, total)
+
+    def test_most_common_top(self):
+        """
+        Test the most_common method with a number of words to keep
+        """
+        total = sum(self.expected.values())
+        for top in (1, 5, 50, 1000):
+            words, grand_total = self.count(10).most_common(top)
+            self.assertEqual(list(words), self.expected.most_common(top))
+            self.assertEqual(grand_total, total)
+
+    def test_close(self):
+        """
+        Test that close removes the temporary runs
+        """
+        counter = self.count(10)
+        runs = list(counter.runs)
+        counter.close()
+        self.assertFalse(any(os.path.exists(path) for path in runs))
+
+
+class TestSpaceSaving(unittest.TestCase):
+    """
+    TestSpaceSaving class Test cases for the SpaceSaving class
+    """
+
+    def setUp(self) -> None:
+        self.blocks = zipf_blocks(20)
+        self.expected = Counter()
+        for block in self.blocks:
+            self.expected.update(block)
+        return super().setUp()
+
+    def assert_bounds(self, summary):
+        """
+        Check that every monitored word has count >= true >= count - error,
+        and that no other word is above the floor
+        """
+        for word, count in summary.counts.items():
+            self.assertGreaterEqual(count, self.expected[word], word)
+            self.assertGreaterEqual(self.expected[word], count - summary.errors[word], word)
+        for word in self.expected.keys() - summary.counts.keys():
+            self.assertLessEqual(self.expected[word], summary.floor(), word)
+
+    def test_bounds(self):
+        """
+        Test the error bounds of a single summary
+        """
+        summary = SpaceSaving(64)
+        for block in self.blocks:
+            summary.update_counts(Counter(block))
+        self.assertEqual(len(summary.counts), 64)
+        self.assert_bounds(summary)
+        top_word, top_count, _ = summary.top(1)[0]
+        self.assertEqual(top_word, self.expected.most_common(1)[0][0])
+        self.assertGreaterEqual(top_count, self.expected[top_word])
+
+    def test_merge(self):
+        """
+        Test the error bounds of a merge of partial summaries
+        """
+        parts = []
+        for start in range(0, len(self.blocks), 10):
+            part = SpaceSaving(64)
+            for block in self.blocks[start:start + 10]:
+                part.update_counts(Counter(block))
+            parts.append(part)
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        self.assertLessEqual(len(merged.counts), 64)
+        self.assert_bounds(merged)
+
+    def test_to_dict(self):
+        """
+        Test the to_dict and from_dict methods
+        """
+        summary = SpaceSaving(64)
+        for block in self.blocks:
+            summary.update_counts(Counter(block))
+        restored = SpaceSaving.from_dict(json.loads(json.dumps(summary.to_dict())))
+        self.assertEqual(restored.counts, summary.counts)
+        self.assertEqual(restored.errors, summary.errors)
+        self.assertEqual(restored.capacity, 64)
+
+
+class TestWordSketch(unittest.TestCase):
+    """
+    TestWordSketch class Test cases for the WordSketch class
+    """
+
+    def setUp(self) -> None:
+        self.blocks = zipf_blocks(24)
+        self.expected = Counter()
+        for block in self.blocks:
+            self.expected.update(block)
+        return super().setUp()
+
+    def sketch(self, blocks, shape=(1024, 4, 64, 10)):
+        """
+        Count the blocks into a new sketch
+        """
+        sketch = WordSketch(*shape)
+        for block in blocks:
+            sketch.update(block)
+        return sketch
+
+    def assert_top(self, sketch):
+        """
+        Check that the true count of every top word is within its bounds
+        """
+        for word, count, error in sketch.top(20):
+            self.assertGreaterEqual(count, self.expected[word], word)
+            self.assertGreaterEqual(self.expected[word], count - error, word)
+
+    def test_single_pass(self):
+        """
+        Test the counts, top words and distinct estimate of one sketch
+        """
+        sketch = self.sketch(self.blocks)
+        self.assertEqual(sketch.total, sum(self.expected.values()))
+        self.assert_top(sketch)
+        # 10 bits of precision: a standard error of about 3%
+        self.assertAlmostEqual(sketch.distinct.estimate() / len(self.expected), 1, delta=0.15)
+
+    def test_merge(self):
+        """
+        Test that merged parts match a single pass: Count-Min counters and
+        HyperLogLog registers exactly, the top words within their bounds
+        """
+        whole = self.sketch(self.blocks)
+        merged = self.sketch(self.blocks[:15])
+        merged.merge(self.sketch(self.blocks[15:]))
+        self.assertEqual(merged.total, whole.total)
+        self.assertEqual(merged.count_min.counters, whole.count_min.counters)
+        self.assertEqual(merged.distinct.registers, whole.distinct.registers)
+        self.assert_top(merged)
+
+    def test_merge_shapes(self):
+        """
+        Test that sketches of different shapes are not merged
+        """
+        for shape in ((512, 4, 64, 10), (1024, 3, 64, 10), (1024, 4, 32, 10), (1024, 4, 64, 11)):
+            with self.subTest(shape=shape):
+                sketch = self.sketch(self.blocks[:5])
+                before = sketch.to_dict()
+                with self.assertRaises(ValueError):
+                    sketch.merge(self.sketch(self.blocks[5:], shape))
+                self.assertEqual(sketch.to_dict(), before)
+
+    def test_to_dict(self):
+        """
+        Test the to_dict and from_dict methods through JSON
+        """
+        sketch = self.sketch(self.blocks)
+        restored = WordSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        self.assertEqual(restored.shape, sketch.shape)
+        self.assertEqual(restored.to_dict(), sketch.to_dict())
+        self.assertEqual(restored.top(20), sketch.top(20))
+        self.assertEqual(restored.distinct.estimate(), sketch.distinct.estimate())
+
+
+class TestNgramCounter(unittest.TestCase):
+    """
+    TestNgramCounter class Test cases for the NgramCounter class
+    """
+
+    def setUp(self) -> None:
+        rng = random.Random(24)
+        self.lines = [
+            " ".join(rng.choice("abcdefgh") * rng.randint(1, 2) for _ in range(rng.randint(0, 8))) + "\n"
+            for _ in range(300)
+        ]
+        # words the first half never saw, so the halves' vocabularies differ
+        self.lines[150:150] = ["zz yy aa\n", "yy zz xx zz yy\n"]
+        return super().setUp()
+
+    def expected(self, n):
+        """
+        The n-gram counts built from tuples of words
+        """
+        counts = Counter()
+        for line in self.lines:
+            words = line.split()
+            counts.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        return counts
+
+    def count(self, n, lines):
+        """
+        Count the lines into a new counter
+        """
+        counter = NgramCounter(n)
+        counter.update_lines(lines)
+        return counter
+
+    def test_serial(self):
+        """
+        Test the counts and their order against tuples of words
+        """
+        for n in (2, 3):
+            with self.subTest(n=n):
+                counter = self.count(n, self.lines)
+                self.assertEqual(list(counter.most_common()), self.expected(n).most_common())
+                self.assertEqual(counter.total, sum(self.expected(n).values()))
+
+    def test_merge(self):
+        """
+        Test that merging two halves matches a serial count, ties included
+        """
+        for n in (2, 3):
+            with self.subTest(n=n):
+                serial = self.count(n, self.lines)
+                merged = self.count(n, self.lines[:150])
+                merged.merge(self.count(n, self.lines[150:]))
+                self.assertEqual(list(merged.most_common()), list(serial.most_common()))
+                self.assertEqual(list(merged.most_common(5)), list(serial.most_common(5)))
+                self.assertEqual(merged.total, serial.total)
+
+    def test_merge_empty(self):
+        """
+        Test merging into and from an empty counter
+        """
+        serial = self.count(2, self.lines)
+        merged = NgramCounter(2)
+        merged.merge(serial)
+        merged.merge(NgramCounter(2))
+        self.assertEqual(list(merged.most_common()), list(serial.most_common()))
+
+
+class TestIndex(unittest.TestCase):
+    """
+    TestIndex class Test cases for the incremental index helpers
+    """
+
+    def test_last_line_end(self):
+        """
+        Test that a half-written last word is left out
+        """
+        with tempfile.TemporaryDirectory() as work:
+            path = os.path.join(work, "text.txt")
+            with open(path, "wb") as file:
+                file.write(b"foo bar\nba")
+            self.assertEqual(last_line_end(path, 0, 10), 8)
+            self.assertEqual(last_line_end(path, 8, 10), 8)
+            self.assertEqual(last_line_end(path, 0, 7), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
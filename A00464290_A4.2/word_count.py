@@ -6,77 +6,1520 @@ Version: 1.0
 Description: Count the frequency of words in a given dataset.
 """
 
+import argparse
+import base64
+import bz2
+import functools
+import glob
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import lzma
+import math
+import mmap
+import operator
+import os
+import queue
+import re
 import sys
+import tempfile
+import threading
 import time
+import unicodedata
 
-def read_data(file_path):
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count as count_from, groupby, islice, repeat
+
+
+def _mark_ranges(limit=0x10000):
+    """
+    Regex character ranges of the combining marks (categories Mn, Mc and Me)
+    below ``limit``. ``\\w`` does not match them, so without them decomposed
+    accents and most Indic vowel signs would split words.
     """
-    Read data from a file and return a list of words.
+    ranges = []
+    for code in range(limit):
+        if unicodedata.category(chr(code)).startswith("M"):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return "".join(f"\\u{first:04x}-\\u{last:04x}" for first, last in ranges)
+
+
+# words are runs of letters, digits and marks, optionally joined by an apostrophe or hyphen
+WORD_CHARACTER = rf"[\w{_mark_ranges()}]"
+WORD_PATTERN = re.compile(rf"{WORD_CHARACTER}+(?:['’-]{WORD_CHARACTER}+)*")
+
+READ_SIZE = 1 << 20
+SHARD_SIZE = 1 << 26
+
+
+def tokenize(text, ignore_case=False, normalize=None):
+    """
+    Split a text into words.
+
+    ASCII text skips the Unicode normalization and is lowercased with the
+    cheaper ``str.lower``; anything else is case folded.
+
+    Args:
+        text (str): The text to split.
+        ignore_case (bool): Case fold the words.
+        normalize (str): Optional Unicode normalization form, "NFC" or "NFKC".
+
+    Returns:
+        list: The words, in order.
+    """
+    if text.isascii():
+        if ignore_case:
+            text = text.lower()
+    else:
+        if normalize:
+            text = unicodedata.normalize(normalize, text)
+        if ignore_case:
+            text = text.casefold()
+    return WORD_PATTERN.findall(text)
+
+
+def _count_lines(lines, freq, ignore_case=False, normalize=None):
+    """
+    Count the words of a batch of lines into ``freq``, a ``Counter``, a
+    ``WordSketch`` or an ``NgramCounter``.
+
+    Returns:
+        int: The number of non-blank lines.
+    """
+    if isinstance(freq, NgramCounter):
+        freq.update_lines(lines, ignore_case, normalize)
+        return sum(1 for line in lines if line.strip())
+    # no word spans a newline, so the whole batch is tokenized at once
+    freq.update(tokenize("".join(lines), ignore_case, normalize))
+    return sum(1 for line in lines if line.strip())
+
+
+def read_data(file_path, ignore_case=False, normalize=None, freq=None):
+    """
+    Read a file and count its words.
+
+    The file is tokenized in batches of lines that feed a ``Counter``
+    directly, so memory grows with the vocabulary, not with the file. A
+    ``WordSketch`` can be passed instead to count in fixed memory.
 
     Args:
         file_path (str): The path to the file.
+        ignore_case (bool): Case fold the words.
+        normalize (str): Optional Unicode normalization form, "NFC" or "NFKC".
+        freq (Counter): Where to count the words, defaults to a new Counter.
 
     Returns:
-        tuple: A tuple containing the list of words and the number of lines read.
+        tuple: A tuple containing the count of every word, in order of first
+        appearance, and the number of lines read.
 
     Raises:
         FileNotFoundError: If the file does not exist.
     """
 
-    data = []
+    if freq is None:
+        freq = Counter()
     lines_read = 0
     try:
         with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
-                if not line.strip():
-                    continue
+            for lines in iter(lambda: file.readlines(READ_SIZE), []):
+                lines_read += _count_lines(lines, freq, ignore_case, normalize)
+
+    except FileNotFoundError:
+        print("Error: File does not exist.")
+        sys.exit(1)
+    return freq, lines_read
+
+
+def _byte_ranges(view, start, stop, block_size):
+    """
+    Split part of a memory-mapped file into byte ranges that end on a newline.
+
+    Args:
+        view (mmap.mmap): The mapped file.
+        start (int): First byte to split, at the start of a line.
+        stop (int): One past the last byte to split.
+        block_size (int): Minimum bytes per range.
+
+    Returns:
+        list: (start, end) byte offsets.
+    """
+    ranges = []
+    while start < stop:
+        newline = view.find(b"\n", min(start + block_size, stop) - 1, stop)
+        end = stop if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _count_range(file_path, start, end, ignore_case, normalize, new_counter=Counter):
+    """
+    Count the words of a newline-aligned byte range of a file in a worker,
+    into a ``Counter`` or whatever ``new_counter`` builds, e.g. a sketch of a
+    given shape.
+
+    Every block is decoded and split into lines with universal newlines, like
+    the text-mode reading of ``read_data``, so the counts are the same.
+
+    Returns:
+        tuple: The count of every word, the number of non-blank lines, the
+        worker's process id and the seconds spent.
+    """
+    started = time.time()
+    freq = new_counter()
+    lines_read = 0
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for block_start, block_end in _byte_ranges(view, start, end, READ_SIZE):
+                text = view[block_start:block_end].decode("utf-8")
+                lines = io.StringIO(text, newline=None).readlines()
+                lines_read += _count_lines(lines, freq, ignore_case, normalize)
+    return freq, lines_read, os.getpid(), time.time() - started
+
+
+def _tree_reduce(partials, merge=Counter.update):
+    """
+    Merge partial counts pairwise as they arrive, like a binary counter: two
+    partials covering the same number of ranges are merged as soon as both
+    exist, the later into the earlier, so words keep their order of first
+    appearance in the file and at most O(log n) partials are alive at once.
+    """
+    # (level, partial) pairs, levels strictly decreasing from the bottom
+    stack = []
+    for partial in partials:
+        level = 0
+        while stack and stack[-1][0] == level:
+            merge(stack[-1][1], partial)
+            partial = stack.pop()[1]
+            level += 1
+        stack.append((level, partial))
+    partial = stack.pop()[1]
+    while stack:
+        merge(stack[-1][1], partial)
+        partial = stack.pop()[1]
+    return partial
+
+
+def _ordered_map(executor, function, *iterables, window):
+    """
+    Like ``executor.map``, but with at most ``window`` calls in flight, so
+    finished results do not pile up faster than they are consumed.
+    """
+    pending = deque()
+    for args in zip(*iterables):
+        pending.append(executor.submit(function, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def read_data_parallel(file_path, workers, ignore_case=False, normalize=None, prototype=None, start=0,
+                       stop=None):
+    """
+    Count the words of a file in a pool of worker processes.
+
+    The file is split into newline-aligned byte ranges (several per worker
+    so they stay busy), every range is counted in a worker and the partial
+    counts are merged in file order with a tree reduction as they come in.
+    Only a few ranges are in flight at a time, so memory stays close to that
+    of ``read_data``. The counts, their order and the line count are the
+    same as with ``read_data``. With a ``prototype`` sketch, every worker
+    fills a fresh sketch and the sketches are merged instead. A pipe or
+    other file that is not a regular file cannot be split into byte ranges,
+    so it is counted with ``read_data`` in this process.
+
+    Args:
+        file_path (str): The path to the file.
+        workers (int): Number of worker processes.
+        ignore_case (bool): Case fold the words.
+        normalize (str): Optional Unicode normalization form, "NFC" or "NFKC".
+        prototype (WordSketch): Optional empty sketch to count into.
+        start (int): Byte offset to start counting at, the start of a line.
+        stop (int): Byte offset to stop counting at, defaults to the end.
+
+    Returns:
+        tuple: The count of every word, the number of lines read, and the
+        number of ranges and seconds spent by every worker.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    if not os.path.isfile(file_path):
+        freq, lines_read = read_data(file_path, ignore_case, normalize, prototype and prototype.fresh())
+        return freq, lines_read, {}
+
+    size = os.path.getsize(file_path)
+    size = size if stop is None else min(stop, size)
+    if start >= size:
+        return (Counter() if prototype is None else prototype.fresh()), 0, {}
+
+    shard_size = min(SHARD_SIZE, max(READ_SIZE, -(-(size - start) // (4 * workers))))
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            ranges = _byte_ranges(view, start, size, shard_size)
+
+    lines_read = 0
+    timings = {}
+
+    def partials(results):
+        nonlocal lines_read
+        for freq, lines, pid, seconds in results:
+            lines_read += lines
+            shards, total = timings.get(pid, (0, 0.0))
+            timings[pid] = (shards + 1, total + seconds)
+            yield freq
+
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    if prototype is None:
+        new_counter, merge = Counter, Counter.update
+    else:
+        # only the shape goes to the workers: an empty sketch can weigh tens of MB
+        new_counter, merge = functools.partial(type(prototype), *prototype.shape), type(prototype).merge
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = _ordered_map(
+            executor, _count_range, repeat(file_path), starts, ends, repeat(ignore_case), repeat(normalize),
+            repeat(new_counter), window=2 * workers,
+        )
+        freq = _tree_reduce(partials(results), merge)
+    return freq, lines_read, timings
+
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+DEFAULT_READERS = 4
+
+
+def is_corpus_path(path):
+    """Whether a path names a directory, a glob or a compressed file."""
+    return os.path.isdir(path) or glob.has_magic(path) or os.path.splitext(path)[1] in OPENERS
+
+
+def expand_inputs(paths):
+    """
+    Expand the input paths into the list of files to count.
+
+    Directories are walked recursively and globs (``**`` included) are
+    matched; both in sorted order. Plain files are kept as given.
+
+    Args:
+        paths (list): Files, directories or glob patterns.
+
+    Returns:
+        list: The file paths, in order.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif glob.has_magic(path):
+            matches = sorted(glob.glob(path, recursive=True))
+            if not matches:
+                print(f"Error: No files match {path}.")
+                sys.exit(1)
+            files.extend(expand_inputs(matches))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print("Error: File does not exist.")
+            sys.exit(1)
+    return files
+
+
+def _open_text(path):
+    """Open a plain, gzip, bzip2 or xz file for reading as UTF-8 text."""
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, "rt", encoding="utf-8")
+
+
+def _count_batch(lines, ignore_case, normalize):
+    """
+    Count the words of a batch of lines in a worker.
+
+    Returns:
+        tuple: The count of every word, the number of non-blank lines, the
+        worker's process id and the seconds spent.
+    """
+    started = time.time()
+    freq = Counter()
+    lines_read = _count_lines(lines, freq, ignore_case, normalize)
+    return freq, lines_read, os.getpid(), time.time() - started
+
+
+def read_corpus(paths, workers, readers=DEFAULT_READERS, ignore_case=False, normalize=None, sketch=None,
+                on_file=None):
+    """
+    Count the words of many, possibly compressed, files.
+
+    A pool of reader threads opens and decompresses the files (the
+    decompressors release the GIL) and sends batches of lines to a pool of
+    worker processes that tokenize and count them. Every file hands its
+    pending batches to the consumer through a small bounded queue, which is
+    drained in file order, and no file is read more than ``2 * readers``
+    files ahead of the consumer, so only a few batches are pending at any
+    time: memory does not grow with the files. The partial counts are
+    merged per file in order, then into the corpus total, so words keep
+    their order of first appearance as if the files were concatenated. With
+    a ``sketch``, every batch's counts are folded into it instead, so memory
+    stays fixed.
+
+    Args:
+        paths (list): The files to count.
+        workers (int): Number of worker processes.
+        readers (int): Number of reader threads.
+        ignore_case (bool): Case fold the words.
+        normalize (str): Optional Unicode normalization form, "NFC" or "NFKC".
+        sketch (WordSketch): Optional empty sketch to count into.
+        on_file (callable): Called with every file path and its counts, in
+            order, before they are merged into the total; not with a sketch.
+
+    Returns:
+        tuple: The count of every word, the number of lines read, and the
+        number of batches and seconds spent by every worker.
+    """
+    # files read ahead of the consumer, and batches each of them may queue:
+    # enough for about 2 batches per worker overall
+    ahead = 2 * readers
+    depth = max(2, -(-2 * workers // readers))
+    stopped = threading.Event()
+    progress = threading.Condition()
+    consumed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def hand_over(batches, item):
+            # the consumer may give up on an error: never block forever
+            while not stopped.is_set():
                 try:
-                    data.append(line.strip())
-                except ValueError:
-                    print(f"Error in line {lines_read+1}: {line.strip()} is not a number.")
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read_file(index, path, batches):
+            try:
+                # waiting on the file index, not on a count of free slots, so
+                # the file being drained is never held up by later ones
+                with progress:
+                    progress.wait_for(lambda: index < consumed + ahead or stopped.is_set())
+                if stopped.is_set():
+                    return
+                with _open_text(path) as file:
+                    for lines in iter(lambda: file.readlines(READ_SIZE), []):
+                        if not hand_over(batches, executor.submit(_count_batch, lines, ignore_case, normalize)):
+                            return
+            finally:
+                hand_over(batches, None)
+
+        total = Counter() if sketch is None else sketch
+        lines_read = 0
+        timings = {}
+        with ThreadPoolExecutor(max_workers=readers) as reader_pool:
+            try:
+                # the pool starts the files in order, so the one being drained
+                # always has a reader
+                queues = [queue.Queue(depth) for _ in paths]
+                reads = [
+                    reader_pool.submit(read_file, index, path, batches)
+                    for index, (path, batches) in enumerate(zip(paths, queues))
+                ]
+                for path, batches, read in zip(paths, queues, reads):
+                    freq = Counter() if sketch is None else sketch
+                    for batch in iter(batches.get, None):
+                        counts, lines, pid, seconds = batch.result()
+                        freq.update(counts)
+                        lines_read += lines
+                        shards, spent = timings.get(pid, (0, 0.0))
+                        timings[pid] = (shards + 1, spent + seconds)
+                    try:
+                        read.result()
+                    except (OSError, EOFError, lzma.LZMAError, UnicodeDecodeError) as error:
+                        print(f"Error: Cannot read {path}: {error}.")
+                        sys.exit(1)
+                    with progress:
+                        consumed += 1
+                        progress.notify_all()
+                    if sketch is None:
+                        if on_file is not None:
+                            on_file(path, freq)
+                        total.update(freq)
+            finally:
+                with progress:
+                    stopped.set()
+                    progress.notify_all()
+    return total, lines_read, timings
+
+
+def _hash64(word):
+    """64-bit BLAKE2b hash of a word, stable across runs and processes."""
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _encode(data):
+    """Base64 text of a bytes-like object, for JSON."""
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: ``depth`` rows of ``width`` counters.
+
+    Every word adds its count to one counter per row, picked by double
+    hashing from its 64-bit hash. The estimate is the smallest of its
+    counters: never below the true count, and above it by at most
+    e / width * total with probability 1 - e^-depth.
+    """
+
+    def __init__(self, width=1 << 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.counters = array("q", bytes(8 * width * depth))
+
+    def _cells(self, hash_value):
+        first = hash_value & 0xFFFFFFFF
+        step = (hash_value >> 32) | 1
+        return [row * self.width + (first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, hash_value, count):
+        """
+        Add the count of a word.
+
+        Parameters:
+        hash_value (int): The word's ``_hash64``.
+        count (int): Occurrences to add.
+        """
+        counters = self.counters
+        for cell in self._cells(hash_value):
+            counters[cell] += count
+        self.total += count
+
+    def estimate(self, hash_value):
+        """
+        Estimated count of a word.
+
+        Parameters:
+        hash_value (int): The word's ``_hash64``.
+
+        Returns:
+        int: An upper bound of the word's count.
+        """
+        counters = self.counters
+        return min(counters[cell] for cell in self._cells(hash_value))
+
+    @property
+    def error(self):
+        """Additive error bound of the estimates (with probability 1 - e^-depth)."""
+        return math.e / self.width * self.total
+
+    def merge(self, other):
+        """
+        Add the counters of a sketch of the same shape.
+
+        Parameters:
+        other (CountMinSketch): The sketch to merge in.
+
+        Raises:
+        ValueError: If the sketches have different shapes.
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches of different shapes cannot be merged")
+        self.counters = array("q", map(operator.add, self.counters, other.counters))
+        self.total += other.total
+
+    def to_dict(self):
+        """
+        Serializable representation of the sketch.
+
+        Returns:
+        dict: The sketch state.
+        """
+        return {"width": self.width, "depth": self.depth, "total": self.total, "counters": _encode(self.counters)}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a sketch from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The sketch state.
+
+        Returns:
+        CountMinSketch: The restored sketch.
+        """
+        sketch = cls(state["width"], state["depth"])
+        sketch.total = state["total"]
+        sketch.counters = array("q", base64.b64decode(state["counters"]))
+        return sketch
+
+
+class SpaceSaving:
+    """
+    SpaceSaving heavy hitters: at most ``capacity`` monitored words.
+
+    A word that is not monitored enters with the smallest monitored count as
+    its error and its count on top of it; when the table overflows, only the
+    ``capacity`` largest counts are kept. Counts never underestimate, and
+    count - error never overestimates. Summaries merge by adding counts,
+    with the smallest count of a full summary standing in for the words it
+    does not monitor (Cafaro et al.).
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def floor(self):
+        """
+        Upper bound of the count of any word that is not monitored.
+
+        Returns:
+        int: The smallest count if the table is full, else 0.
+        """
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def _combine(self, counts, errors, other_floor):
+        own_counts = self.counts
+        own_errors = self.errors
+        own_floor = self.floor()
+        if other_floor:
+            for word in own_counts.keys() - counts.keys():
+                own_counts[word] += other_floor
+                own_errors[word] += other_floor
+        for word, count in counts.items():
+            error = errors.get(word, 0)
+            if word in own_counts:
+                own_counts[word] += count
+                own_errors[word] += error
+            else:
+                own_counts[word] = own_floor + count
+                own_errors[word] = own_floor + error
+        if len(own_counts) > self.capacity:
+            kept = heapq.nlargest(self.capacity, own_counts.items(), key=operator.itemgetter(1))
+            self.counts = dict(kept)
+            self.errors = {word: own_errors[word] for word, _ in kept}
+
+    def update_counts(self, counts):
+        """
+        Count a block of exact word counts.
+
+        Parameters:
+        counts (Counter): The count of every word of the block.
+        """
+        self._combine(counts, {}, 0)
+
+    def merge(self, other):
+        """
+        Merge another summary into this one.
+
+        Parameters:
+        other (SpaceSaving): The summary to merge in.
+        """
+        self._combine(other.counts, other.errors, other.floor())
+
+    def top(self, k):
+        """
+        The k words with the largest counts.
+
+        Parameters:
+        k (int): Number of words to report.
+
+        Returns:
+        list: (word, count, error) triples, most frequent first.
+        """
+        return [
+            (word, count, self.errors[word])
+            for word, count in heapq.nlargest(k, self.counts.items(), key=operator.itemgetter(1))
+        ]
+
+    def to_dict(self):
+        """
+        Serializable representation of the summary.
+
+        Returns:
+        dict: The summary state.
+        """
+        return {
+            "capacity": self.capacity,
+            "words": list(self.counts),
+            "counts": list(self.counts.values()),
+            "errors": [self.errors[word] for word in self.counts],
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a summary from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The summary state.
+
+        Returns:
+        SpaceSaving: The restored summary.
+        """
+        summary = cls(state["capacity"])
+        summary.counts = dict(zip(state["words"], state["counts"]))
+        summary.errors = dict(zip(state["words"], state["errors"]))
+        return summary
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2^precision one-byte registers.
+
+    The first ``precision`` bits of a word's hash pick a register, which
+    keeps the largest position of the first 1 bit in the remaining bits.
+    The relative standard error is about 1.04 / sqrt(2^precision).
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, hash_value):
+        """
+        Add a word.
+
+        Parameters:
+        hash_value (int): The word's ``_hash64``.
+        """
+        bits = 64 - self.precision
+        index = hash_value >> bits
+        rank = bits - (hash_value & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self):
+        """
+        Estimated number of distinct words.
+
+        Returns:
+        float: The estimate, with linear counting for small cardinalities.
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            return size * math.log(size / zeros)
+        return raw
+
+    def merge(self, other):
+        """
+        Merge a counter of the same precision.
+
+        Parameters:
+        other (HyperLogLog): The counter to merge in.
+
+        Raises:
+        ValueError: If the precisions differ.
+        """
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLog counters of different precisions cannot be merged")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_dict(self):
+        """
+        Serializable representation of the counter.
+
+        Returns:
+        dict: The counter state.
+        """
+        return {"precision": self.precision, "registers": _encode(self.registers)}
 
-                lines_read += 1
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a counter from ``to_dict`` output.
 
+        Parameters:
+        state (dict): The counter state.
+
+        Returns:
+        HyperLogLog: The restored counter.
+        """
+        counter = cls(state["precision"])
+        counter.registers = bytearray(base64.b64decode(state["registers"]))
+        return counter
+
+
+# words listed in --sketch mode without --top
+DEFAULT_SKETCH_TOP = 100
+
+# rough bytes per word held in memory: the word and its dict slots with their ints
+ENTRY_BYTES = 200
+
+
+class WordSketch:
+    """
+    Fixed-memory word counts: a Count-Min sketch and a SpaceSaving table for
+    the top words and their counts, and a HyperLogLog for the number of
+    distinct words. Like a ``Counter``, words are fed with ``update``; every
+    block is counted exactly first so each distinct word is hashed once.
+    Sketches of the same shape can be merged.
+    """
+
+    def __init__(self, width=1 << 16, depth=4, capacity=1024, precision=14):
+        self.count_min = CountMinSketch(width, depth)
+        self.heavy_hitters = SpaceSaving(capacity)
+        self.distinct = HyperLogLog(precision)
+
+    @classmethod
+    def for_memory(cls, budget, depth=4):
+        """
+        A sketch that fits in about ``budget`` bytes: 1/16 for the HyperLogLog
+        (at most 64 KiB) and the rest split between the SpaceSaving table and
+        the Count-Min counters.
+
+        Parameters:
+        budget (int): The memory budget in bytes.
+        depth (int): Rows of the Count-Min sketch.
+
+        Returns:
+        WordSketch: An empty sketch.
+        """
+        precision = min(16, max(4, (budget // 16).bit_length() - 1))
+        rest = max(budget - (1 << precision), 0) // 2
+        capacity = max(16, rest // ENTRY_BYTES)
+        width = max(16, rest // (8 * depth))
+        return cls(width, depth, capacity, precision)
+
+    @property
+    def shape(self):
+        """The constructor arguments: (width, depth, capacity, precision)."""
+        return self.count_min.width, self.count_min.depth, self.heavy_hitters.capacity, self.distinct.precision
+
+    def fresh(self):
+        """
+        Return an empty sketch of the same shape.
+
+        Returns:
+        WordSketch: An empty sketch.
+        """
+        return WordSketch(*self.shape)
+
+    @property
+    def total(self):
+        """The number of words counted."""
+        return self.count_min.total
+
+    def update(self, words):
+        """
+        Count a block of words.
+
+        Parameters:
+        words (iterable): The words.
+        """
+        counts = Counter(words)
+        for word, count in counts.items():
+            hash_value = _hash64(word)
+            self.count_min.add(hash_value, count)
+            self.distinct.add(hash_value)
+        self.heavy_hitters.update_counts(counts)
+
+    def merge(self, other):
+        """
+        Merge a sketch of the same shape.
+
+        Parameters:
+        other (WordSketch): The sketch to merge in.
+
+        Raises:
+        ValueError: If the sketches have different shapes.
+        """
+        # checked up front, so a mismatch leaves this sketch untouched
+        if self.shape != other.shape:
+            raise ValueError("word sketches of different shapes cannot be merged")
+        self.count_min.merge(other.count_min)
+        self.distinct.merge(other.distinct)
+        self.heavy_hitters.merge(other.heavy_hitters)
+
+    def top(self, k):
+        """
+        The k most frequent words, with counts that are the tighter of the
+        SpaceSaving and Count-Min upper bounds.
+
+        Parameters:
+        k (int): Number of words to report.
+
+        Returns:
+        list: (word, count, error) triples, most frequent first; the true
+        count is between count - error and count.
+        """
+        results = []
+        for word, count, error in self.heavy_hitters.top(k):
+            estimate = min(count, self.count_min.estimate(_hash64(word)))
+            results.append((word, estimate, estimate - (count - error)))
+        return results
+
+    def to_dict(self):
+        """
+        Serializable representation of the sketch.
+
+        Returns:
+        dict: The sketch state.
+        """
+        return {
+            "count_min": self.count_min.to_dict(),
+            "heavy_hitters": self.heavy_hitters.to_dict(),
+            "distinct": self.distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a sketch from ``to_dict`` output.
+
+        Parameters:
+        state (dict): The sketch state.
+
+        Returns:
+        WordSketch: The restored sketch.
+        """
+        sketch = cls.__new__(cls)
+        sketch.count_min = CountMinSketch.from_dict(state["count_min"])
+        sketch.heavy_hitters = SpaceSaving.from_dict(state["heavy_hitters"])
+        sketch.distinct = HyperLogLog.from_dict(state["distinct"])
+        return sketch
+
+
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+class NgramCounter:
+    """
+    Exact counts of the n-grams (runs of n consecutive words of a line).
+
+    Every word is interned once in a vocabulary that maps it to an integer
+    id, and every n-gram is counted under a single integer key that packs
+    the ids of its words in 32-bit fields, e.g. ``a << 32 | b`` for a
+    bigram. A key is a 36 to 40 byte int instead of a tuple of n strings,
+    and every word is stored once no matter how many n-grams it is part of.
+    """
+
+    def __init__(self, n=2):
+        self.n = n
+        # ids are assigned in order of first appearance, so the dict's order
+        # is the id -> word mapping
+        self.vocabulary = {}
+        self.counts = Counter()
+
+    @property
+    def shape(self):
+        """The constructor arguments: (n,)."""
+        return (self.n,)
+
+    def fresh(self):
+        """An empty counter of the same n."""
+        return type(self)(*self.shape)
+
+    @property
+    def total(self):
+        """The number of n-grams counted."""
+        return sum(self.counts.values())
+
+    def update_lines(self, lines, ignore_case=False, normalize=None):
+        """Count the n-grams of every line; n-grams do not span lines."""
+        vocabulary = self.vocabulary
+        intern = vocabulary.setdefault
+        keys = []
+        for line in lines:
+            words = tokenize(line, ignore_case, normalize)
+            if len(words) < self.n:
+                continue
+            ids = [intern(word, len(vocabulary)) for word in words]
+            packed = ids
+            for offset in range(1, self.n):
+                packed = map(operator.or_, map(operator.lshift, packed, repeat(ID_BITS)), ids[offset:])
+            keys.extend(packed)
+        self.counts.update(keys)
+
+    def merge(self, other):
+        """
+        Add the counts of another counter of the same n, translating its ids
+        to this vocabulary. The other's n-grams new to this counter are added
+        after the existing ones, in their order.
+        """
+        intern = self.vocabulary.setdefault
+        ids = [intern(word, len(self.vocabulary)) for word in other.vocabulary]
+        counts = self.counts
+        for key, count in other.counts.items():
+            new_key = 0
+            for shift in range(ID_BITS * (self.n - 1), -1, -ID_BITS):
+                new_key = new_key << ID_BITS | ids[key >> shift & ID_MASK]
+            counts[new_key] += count
+
+    def decode(self, key):
+        """The words of a packed key, joined by spaces."""
+        words = self._words
+        return " ".join(
+            words[key >> shift & ID_MASK] for shift in range(ID_BITS * (self.n - 1), -1, -ID_BITS)
+        )
+
+    def most_common(self, top=None):
+        """
+        The n-grams from the most to the least frequent, ties in order of
+        first appearance, as (n-gram, count) pairs decoded one at a time.
+
+        Args:
+            top (int): Optional number of n-grams to keep.
+
+        Returns:
+            iterator: (n-gram, count) pairs.
+        """
+        self._words = list(self.vocabulary)
+        if top is not None:
+            ranked = heapq.nlargest(top, self.counts.items(), key=operator.itemgetter(1))
+        else:
+            ranked = self.counts.most_common()
+        return ((self.decode(key), count) for key, count in ranked)
+
+
+def _write_run(path, rows):
+    """Write tab-separated rows to a run file."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines("\t".join(map(str, row)) + "\n" for row in rows)
+
+
+def _read_run(path, word_column):
+    """
+    Read back a run written by ``_write_run``: every column but the word is
+    an integer.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            row = line.rstrip("\n").split("\t")
+            yield tuple(column if index == word_column else int(column) for index, column in enumerate(row))
+
+
+class SpillingCounter:
+    """
+    Exact word counts within a memory budget.
+
+    Words are counted in an in-memory ``Counter``; when it holds more words
+    than the budget allows, it is written to a temporary file as a run
+    sorted by word and cleared. The runs are combined with a k-way merge
+    (``heapq.merge``) that streams every word once with its total count.
+
+    To list the words in the same order as an in-memory ``Counter`` (most
+    frequent first, ties in order of first appearance), every run also
+    records the position of each word's first appearance: the dict order of
+    the run, offset by the words spilled before it.
+    """
+
+    def __init__(self, budget, temp_dir=None):
+        self.max_words = max(1, budget // ENTRY_BYTES)
+        self.counts = Counter()
+        self.runs = []
+        self.spilled = 0
+        self._work = tempfile.TemporaryDirectory(dir=temp_dir)
+
+    def update(self, words):
+        """
+        Count a block of words, spilling a run if the budget is exceeded.
+
+        Parameters:
+        words (iterable): The words.
+        """
+        self.counts.update(words)
+        if len(self.counts) > self.max_words:
+            self._spill()
+
+    def _spill(self):
+        path = os.path.join(self._work.name, f"run{len(self.runs)}.tsv")
+        _write_run(path, self._sorted_run())
+        self.runs.append(path)
+        self.spilled += len(self.counts)
+        self.counts = Counter()
+
+    def _sorted_run(self):
+        """The in-memory words as (word, count, first position), sorted by word."""
+        return sorted(zip(self.counts, self.counts.values(), count_from(self.spilled)))
+
+    def merged(self):
+        """
+        Merge the runs and the words still in memory.
+
+        Yields:
+            tuple: (word, count, first position), in word order.
+        """
+        runs = [_read_run(path, 0) for path in self.runs]
+        runs.append(iter(self._sorted_run()))
+        for word, rows in groupby(heapq.merge(*runs), key=operator.itemgetter(0)):
+            total = 0
+            first = None
+            for _, count, position in rows:
+                total += count
+                first = position if first is None else min(first, position)
+            yield word, total, first
+
+    def most_common(self, top=None):
+        """
+        The words from the most to the least frequent, ties in order of first
+        appearance, with the total number of words.
+
+        With ``top`` only a heap of that size is kept during the merge.
+        Otherwise the merged words are sorted externally: runs of at most the
+        budget are sorted by (-count, position), spilled, and merged again as
+        the result is consumed.
+
+        Parameters:
+        top (int): Optional number of words to keep.
+
+        Returns:
+        tuple: An iterator of (word, count) pairs and the grand total.
+        """
+        grand_total = 0
+        if top is not None:
+            best = []
+            for word, count, position in self.merged():
+                grand_total += count
+                entry = (count, -position, word)
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            best.sort(reverse=True)
+            return ((word, count) for count, _, word in best), grand_total
+
+        sorted_runs = []
+        chunk = []
+        for word, count, position in self.merged():
+            grand_total += count
+            chunk.append((-count, position, word))
+            if len(chunk) >= self.max_words:
+                chunk.sort()
+                path = os.path.join(self._work.name, f"sorted{len(sorted_runs)}.tsv")
+                _write_run(path, chunk)
+                sorted_runs.append(_read_run(path, 2))
+                chunk = []
+        chunk.sort()
+        sorted_runs.append(iter(chunk))
+        return ((word, -count) for count, _, word in heapq.merge(*sorted_runs)), grand_total
+
+    def close(self):
+        """Remove the temporary runs."""
+        self._work.cleanup()
+
+
+def save_sketch(path, sketch):
+    """
+    Save a sketch as JSON, with its counters base64 encoded.
+
+    Args:
+        path (str): The output file.
+        sketch (WordSketch): The sketch.
+
+    Returns:
+        None
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(sketch.to_dict(), file)
+
+
+def load_sketch(path):
+    """
+    Load a sketch written by ``save_sketch``.
+
+    Args:
+        path (str): The sketch file.
+
+    Returns:
+        WordSketch: The sketch.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return WordSketch.from_dict(json.load(file))
+    except FileNotFoundError:
+        print(f"Error: Sketch file {path} does not exist.")
+        sys.exit(1)
+
+
+FINGERPRINT_SAMPLE = 1 << 16
+FINGERPRINT_POINTS = 16
+
+
+def prefix_fingerprint(file_path, offset):
+    """
+    Cheap content fingerprint of the first ``offset`` bytes of a file: its
+    length and BLAKE2b of the head, the tail and evenly spaced samples.
+
+    Args:
+        file_path (str): The path to the file.
+        offset (int): Length of the prefix.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.blake2b(str(offset).encode(), digest_size=16)
+    positions = {0, max(0, offset - FINGERPRINT_SAMPLE)}
+    positions.update(offset * i // (FINGERPRINT_POINTS + 1) for i in range(1, FINGERPRINT_POINTS + 1))
+    with open(file_path, "rb") as file:
+        for position in sorted(positions):
+            file.seek(position)
+            digest.update(file.read(min(FINGERPRINT_SAMPLE, offset - position)))
+    return digest.hexdigest()
+
+
+def last_line_end(file_path, start, stop):
+    """
+    Offset just past the last newline between ``start`` and ``stop``, read
+    backwards in blocks, so a line still being written is left for later.
+
+    Args:
+        file_path (str): The path to the file.
+        start (int): First byte to search.
+        stop (int): One past the last byte to search.
+
+    Returns:
+        int: The end of the last complete line, or ``start`` if there is none.
+    """
+    with open(file_path, "rb") as file:
+        end = stop
+        while end > start:
+            begin = max(start, end - FINGERPRINT_SAMPLE)
+            file.seek(begin)
+            newline = file.read(end - begin).rfind(b"\n")
+            if newline != -1:
+                return begin + newline + 1
+            end = begin
+    return start
+
+
+def load_index(index_path, file_path, size, ignore_case, normalize):
+    """
+    Load the word-count index saved by ``save_index`` if it still describes
+    a prefix of the file, counted with the same options.
+
+    The index is discarded when it is missing or unreadable, was counted
+    with other tokenizer options, is longer than the file, or the prefix
+    fingerprint changed.
+
+    Args:
+        index_path (str): The index file.
+        file_path (str): The path to the text file.
+        size (int): Current size of the text file.
+        ignore_case (bool): Whether the run case folds the words.
+        normalize (str): The run's Unicode normalization form, or None.
+
+    Returns:
+        tuple: The index header and the count of every word, or None if
+        everything has to be recounted.
+    """
+    try:
+        with gzip.open(index_path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            offset = header["offset"]
+            if [header["ignore_case"], header["normalize"]] != [ignore_case, normalize] or offset > size:
+                return None
+            if prefix_fingerprint(file_path, offset) != header["fingerprint"]:
+                return None
+            freq = Counter()
+            for line in file:
+                word, count = line.rstrip("\n").split("\t")
+                freq[word] = int(count)
+    except (OSError, EOFError, KeyError, ValueError):
+        return None
+    return header, freq
+
+
+def save_index(index_path, file_path, offset, lines, freq, ignore_case, normalize):
+    """
+    Save the word counts of the first ``offset`` bytes of a file as a gzip
+    TSV index: a JSON header line (offset, prefix fingerprint, line count and
+    tokenizer options), then one "word<TAB>count" line per word in order of
+    first appearance.
+
+    Args:
+        index_path (str): The index file.
+        file_path (str): The path to the text file.
+        offset (int): Bytes of the file counted so far, the end of a line.
+        lines (int): Lines read so far.
+        freq (Counter): The count of every word.
+        ignore_case (bool): Whether the words were case folded.
+        normalize (str): The Unicode normalization form, or None.
+
+    Returns:
+        None
+    """
+    header = {
+        "offset": offset,
+        "fingerprint": prefix_fingerprint(file_path, offset),
+        "lines": lines,
+        "ignore_case": ignore_case,
+        "normalize": normalize,
+    }
+    temp_path = f"{index_path}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as file:
+        file.write(json.dumps(header) + "\n")
+        items = iter(freq.items())
+        for batch in iter(lambda: list(islice(items, 1 << 16)), []):
+            file.writelines(f"{word}\t{count}\n" for word, count in batch)
+    os.replace(temp_path, index_path)
+
+
+def update_index(args):
+    """
+    Bring the word-count index of the text file up to date: reuse the saved
+    counts and tokenize only the bytes appended since. A last line without
+    its newline is left for the next run, as it may still be being written.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        tuple: (byte offset counting resumed at, count of every word, lines
+        read, worker timings or None).
+    """
+    try:
+        size = os.path.getsize(args.file_path)
     except FileNotFoundError:
         print("Error: File does not exist.")
         sys.exit(1)
-    return data, lines_read
+    if not os.path.isfile(args.file_path):
+        # the offsets of a pipe cannot be read again
+        print("Error: --index requires a regular file.")
+        sys.exit(1)
+
+    index = load_index(args.index, args.file_path, size, args.ignore_case, args.normalize)
+    if index is None:
+        offset = lines = 0
+        freq = Counter()
+    else:
+        header, freq = index
+        offset = header["offset"]
+        lines = header["lines"]
+
+    stop = last_line_end(args.file_path, offset, size)
+    timings = None
+    if args.workers > 1:
+        tail, new_lines, timings = read_data_parallel(
+            args.file_path, args.workers, args.ignore_case, args.normalize, start=offset, stop=stop
+        )
+    elif offset < stop:
+        tail, new_lines, _, _ = _count_range(args.file_path, offset, stop, args.ignore_case, args.normalize)
+    else:
+        tail, new_lines = Counter(), 0
+    freq.update(tail)
+    save_index(args.index, args.file_path, stop, lines + new_lines, freq, args.ignore_case, args.normalize)
+    return offset, freq, lines + new_lines, timings
 
-def count_words_freq(data):
+
+def count_words_freq(freq, top=None):
     """
-    Count the frequency of words in a list of words.
+    Sort the frequency of words from the most to the least frequent.
+
+    With ``top`` only the most frequent words are selected with a heap of
+    that size, in O(V log top) instead of sorting the whole vocabulary.
+    ``heapq.nlargest`` is stable, so in both cases ties keep the order of
+    first appearance and the top words are the first ones of the full sort.
 
     Parameters:
-    data (list): A list of words.
+    freq (Counter): The count of every word, in order of first appearance.
+    top (int): Optional number of words to keep.
 
     Returns:
-    dict: A dictionary containing the frequency of each word.
+    dict: A dictionary containing the frequency of each word; ties keep the
+    order of first appearance.
     """
-    freq = {}
-    for word in data:
-        if word in freq:
-            freq[word] += 1
-        else:
-            freq[word] = 1
+    if top is not None:
+        return dict(heapq.nlargest(top, freq.items(), key=operator.itemgetter(1)))
+    return dict(freq.most_common())
 
-    freq = dict(sorted(freq.items(), key=lambda item: item[1], reverse=True))
-    return freq
-
-def print_freq(freq):
+def print_freq(freq, grand_total=None, title=None, total_label="Grand Total", append=False):
     """
     Print the frequency of each word in a dictionary.
 
+    The lines are written in batches, so an iterator of pairs is streamed
+    without holding the whole table.
+
     Parameters:
-    freq (dict): A dictionary containing the frequency of each word.
+    freq (dict): A dictionary containing the frequency of each word, or an
+        iterable of (word, count) pairs.
+    grand_total (int): Total of all the words, defaults to the total of
+        ``freq`` (pass it when ``freq`` is only the top words).
+    title (str): Optional line printed before the table.
+    total_label (str): Label of the total line.
+    append (bool): Append to the results file instead of overwriting it.
     """
-    with open("word_count_results.txt", "w", encoding="utf-8") as file:
-        for word, count in freq.items():
-            print(f"{word}\t{count}")
-            file.write(f"{word}\t{count}\n")
-
+    if grand_total is None:
         grand_total = sum(freq.values())
-        print(f"Grand Total\t{grand_total}")
-        file.write(f"Grand Total\t{grand_total}\n")
+    items = iter(freq.items() if isinstance(freq, dict) else freq)
+    with open("word_count_results.txt", "a" if append else "w", encoding="utf-8") as file:
+        if title is not None:
+            sys.stdout.write(f"{title}\n")
+            file.write(f"{title}\n")
+        for batch in iter(lambda: list(islice(items, 1 << 16)), []):
+            lines = [f"{word}\t{count}\n" for word, count in batch]
+            sys.stdout.writelines(lines)
+            file.writelines(lines)
+        sys.stdout.write(f"{total_label}\t{grand_total}\n")
+        file.write(f"{total_label}\t{grand_total}\n")
+
+def parse_size(text):
+    """
+    Parse a byte size such as "4096", "512K", "64M" or "2G".
+
+    Args:
+        text (str): The command line value.
+
+    Returns:
+        int: The size in bytes.
+    """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().removesuffix("B")
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}") from error
+    if size <= 0:
+        raise argparse.ArgumentTypeError("size must be positive")
+    return size
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+
+    Args:
+        argv (list): The arguments, defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="word_count.py",
+        description="Count the frequency of words in a given dataset.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="text file to count the words of; several files, directories, globs and .gz/.bz2/.xz files "
+        "are counted as one corpus",
+    )
+    parser.add_argument(
+        "--ignore-case",
+        action="store_true",
+        help="count words case-insensitively (Unicode case folding)",
+    )
+    parser.add_argument(
+        "--normalize",
+        choices=("NFC", "NFKC"),
+        help="apply this Unicode normalization before counting",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="count the file in N worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        metavar="N",
+        help="only list the N most frequent words (the Grand Total still counts every word)",
+    )
+    parser.add_argument(
+        "--sketch",
+        action="store_true",
+        help="count in fixed memory: approximate top words and distinct count",
+    )
+    parser.add_argument(
+        "--sketch-memory",
+        type=parse_size,
+        default=64 << 20,
+        metavar="SIZE",
+        help="memory budget of the sketch, e.g. 512M (default: 64M)",
+    )
+    parser.add_argument(
+        "--sketch-in",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="merge a sketch saved with --sketch-out (repeatable)",
+    )
+    parser.add_argument(
+        "--sketch-out",
+        metavar="FILE",
+        help="save the merged sketch so later runs can merge it",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="count exactly within this memory budget, spilling sorted runs to disk, e.g. 512M",
+    )
+    parser.add_argument(
+        "--temp-dir",
+        metavar="DIR",
+        help="directory for the spilled runs (default: system temp)",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="FILE",
+        help="persistent word-count index: only the bytes appended since the last run are counted. A "
+        "rewritten prefix is detected from its length and sampled regions (head, tail and 16 points of "
+        "64 KiB), not from every byte",
+    )
+    parser.add_argument(
+        "--ngram",
+        type=int,
+        choices=(2, 3),
+        metavar="N",
+        help="count bigrams (2) or trigrams (3) of the words of every line instead of words",
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=DEFAULT_READERS,
+        metavar="N",
+        help=f"threads reading and decompressing corpus files (default: {DEFAULT_READERS})",
+    )
+    parser.add_argument(
+        "--per-file",
+        action="store_true",
+        help="also list the word counts of every corpus file",
+    )
+    args = parser.parse_args(argv)
+    args.corpus = args.per_file or len(args.paths) > 1 or is_corpus_path(args.paths[0])
+    args.file_path = None if args.corpus else args.paths[0]
+    if args.corpus and (args.index or args.max_memory):
+        parser.error("--index and --max-memory need a single uncompressed file")
+    if args.ngram and (args.corpus or args.sketch or args.max_memory or args.index):
+        parser.error("--ngram needs a single uncompressed file and cannot be combined with "
+                     "--sketch, --max-memory or --index")
+    if args.per_file and args.sketch:
+        parser.error("--per-file cannot be combined with --sketch")
+    if args.readers < 1:
+        parser.error("--readers must be at least 1")
+    if args.index and (args.sketch or args.max_memory):
+        parser.error("--index cannot be combined with --sketch or --max-memory")
+    if args.max_memory and (args.sketch or args.workers > 1):
+        parser.error("--max-memory cannot be combined with --sketch or --workers")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.top is not None and args.top < 1:
+        parser.error("--top must be at least 1")
+    if (args.sketch_in or args.sketch_out) and not args.sketch:
+        parser.error("--sketch-in and --sketch-out require --sketch")
+    return args
 
 def main():
     """
@@ -85,25 +1528,88 @@ def main():
     Reads a file path from the command line arguments, reads the data from the file,
     counts the frequency of each word in the data, prints the frequency, and writes
     the elapsed time to a file.
+
+    Usage: python word_count.py <path> [<path> ...] [--ignore-case] [--normalize {NFC,NFKC}] [--workers N]
+           [--readers N] [--per-file] [--ngram {2,3}] [--top N]
+           [--sketch [--sketch-memory SIZE] [--sketch-in FILE] [--sketch-out FILE]]
+           [--max-memory SIZE [--temp-dir DIR]] [--index FILE]
     """
-    if len(sys.argv) != 2:
-        print("Usage: python compute_statistics.py <file_path>")
-        sys.exit(1)
+    args = parse_args()
 
     start = time.time()
 
-    file_path = sys.argv[1]
-    data, _ = read_data(file_path)
+    # what to count into instead of a Counter of the words
+    counter = None
+    if args.sketch:
+        merged = [load_sketch(path) for path in args.sketch_in]
+        # sketches only merge with the same shape: reuse the saved one's
+        counter = merged[0].fresh() if merged else WordSketch.for_memory(args.sketch_memory)
+    elif args.ngram:
+        counter = NgramCounter(args.ngram)
+
+    # the first table overwrites the results file, the others are appended
+    tables = count_from()
+
+    def print_file(path, freq):
+        print_freq(count_words_freq(freq, args.top), sum(freq.values()), f"File\t{path}", "Total", next(tables) > 0)
+
+    timings = None
+    if args.corpus:
+        data, _, timings = read_corpus(
+            expand_inputs(args.paths), args.workers, args.readers, args.ignore_case, args.normalize, counter,
+            print_file if args.per_file else None,
+        )
+    elif args.index:
+        resumed_at, data, _, timings = update_index(args)
+    elif args.max_memory:
+        data, _ = read_data(
+            args.file_path, args.ignore_case, args.normalize, SpillingCounter(args.max_memory, args.temp_dir)
+        )
+    elif args.workers > 1:
+        data, _, timings = read_data_parallel(
+            args.file_path, args.workers, args.ignore_case, args.normalize, counter
+        )
+    else:
+        data, _ = read_data(args.file_path, args.ignore_case, args.normalize, counter)
 
-    freq = count_words_freq(data)
-    print_freq(freq)
+    summary = []
+    if args.sketch:
+        try:
+            for other in merged:
+                data.merge(other)
+        except ValueError as error:
+            print(f"Error: {error}.")
+            sys.exit(1)
+        if args.sketch_out:
+            save_sketch(args.sketch_out, data)
+        top = data.top(args.top or DEFAULT_SKETCH_TOP)
+        print_freq({word: count for word, count, _ in top}, data.total)
+        summary.append(f"DISTINCT:\t{round(data.distinct.estimate())}")
+        summary.append(f"MAX ERROR:\t{max((error for _, _, error in top), default=0)}")
+    elif args.ngram:
+        print_freq(data.most_common(args.top), data.total)
+    elif args.max_memory:
+        try:
+            freq, grand_total = data.most_common(args.top)
+            print_freq(freq, grand_total)
+        finally:
+            data.close()
+    else:
+        freq = count_words_freq(data, args.top)
+        print_freq(freq, sum(data.values()), append=next(tables) > 0)
+    if args.index:
+        summary.append(f"RESUMED AT:\t{resumed_at}")
     end = time.time()
     elapsed_time = end - start
 
-    print(f"TIME:\t{elapsed_time}")
+    summary.append(f"TIME:\t{elapsed_time}")
+    if timings is not None:
+        for index, (shards, seconds) in enumerate(timings.values(), 1):
+            summary.append(f"WORKER {index}:\t{seconds}\t{shards} shards")
+    print("\n".join(summary))
 
     with open("word_count_results.txt", "a", encoding="utf-8") as file:
-        file.write(f"TIME:\t{elapsed_time}\n")
+        file.write("\n".join(summary) + "\n")
 
 
 if __name__ == "__main__":
@@ -8,14 +8,144 @@ Description: Compute total sales for a given dataset.
 
 import sys
 import json
+import re
 import time
 
 from os.path import exists
+from typing import Any, Iterator, TextIO
+
+READ_SIZE = 1 << 16
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARS = "0123456789+-.eE"
+# longest token a chunk boundary can cut short: an escaped surrogate pair
+TOKEN_MARGIN = len("\\ud834\\udd1e")
+
+
+def _decode_error(
+    msg: str, buffer: str, pos: int, consumed: int, lineno: int, line_start: int
+) -> json.JSONDecodeError:
+    """
+    Build a ``json.JSONDecodeError`` for a position in the buffer, with the
+    line, column and character counted from the start of the file, like
+    ``json.load`` reports them.
+
+    Args:
+        msg (str): The error message.
+        buffer (str): The buffer the error was found in.
+        pos (int): Position of the error in the buffer.
+        consumed (int): Characters of the file dropped before the buffer.
+        lineno (int): Line of the file the buffer starts on.
+        line_start (int): File position of the start of that line.
+
+    Returns:
+        json.JSONDecodeError: The error, positions relative to the file.
+    """
+    error = json.JSONDecodeError(msg, buffer, pos)
+    newlines = buffer.count("\n", 0, pos)
+    error.pos = consumed + pos
+    error.lineno = lineno + newlines
+    if newlines:
+        error.colno = pos - buffer.rfind("\n", 0, pos)
+    else:
+        error.colno = consumed + pos - line_start + 1
+    error.args = (f"{msg}: line {error.lineno} column {error.colno} (char {error.pos})",)
+    return error
+
+
+def iter_json_array(file: TextIO, chunk_size: int = READ_SIZE) -> Iterator[Any]:
+    """
+    Decode the elements of a top-level JSON array one at a time.
+
+    The file is read in chunks into a buffer and every element is decoded
+    with ``json.JSONDecoder.raw_decode``; an element cut by the end of the
+    buffer is retried after reading more, twice as much on every retry so a
+    large element is read in linear time. Decoded text is dropped from the
+    buffer, so memory is bounded by the largest element, not by the file.
+
+    Args:
+        file (TextIO): The open JSON file.
+        chunk_size (int): Number of characters to read at a time.
+
+    Yields:
+        Any: Every element of the array, in order.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a valid JSON array, or
+        anything but whitespace follows it; positions count from the start
+        of the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    # where the buffer starts in the file, to report errors like json.load
+    consumed = 0
+    lineno = 1
+    line_start = 0
+    read_size = chunk_size
+    eof = False
+    # what comes next: "[", the first element or "]", an element, "," or "]", or nothing
+    expect = "["
+    while True:
+        pos = WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == "end":
+                raise _decode_error("Extra data", buffer, pos, consumed, lineno, line_start)
+            if expect == "[":
+                if char != "[":
+                    raise _decode_error("Expecting '['", buffer, pos, consumed, lineno, line_start)
+                pos += 1
+                expect = "first"
+                continue
+            if expect == ",":
+                if char == "]":
+                    pos += 1
+                    expect = "end"
+                    continue
+                if char != ",":
+                    raise _decode_error("Expecting ',' delimiter", buffer, pos, consumed, lineno, line_start)
+                pos += 1
+                expect = "element"
+                continue
+            if expect == "first" and char == "]":
+                pos += 1
+                expect = "end"
+                continue
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as error:
+                # only an error at the end of the buffer can come from a cut element
+                cut = len(buffer) - error.pos < TOKEN_MARGIN or error.msg.startswith("Unterminated string")
+                if eof or not cut:
+                    raise _decode_error(error.msg, buffer, error.pos, consumed, lineno, line_start) from None
+            else:
+                # a number cut by the end of the buffer may continue in the next chunk
+                if eof or end < len(buffer) and buffer[end] not in NUMBER_CHARS:
+                    yield element
+                    pos = end
+                    expect = ","
+                    read_size = chunk_size
+                    continue
+            read_size *= 2
+        elif eof:
+            if expect == "end":
+                return
+            raise _decode_error("Unexpected end of the array", buffer, pos, consumed, lineno, line_start)
+
+        newlines = buffer.count("\n", 0, pos)
+        if newlines:
+            lineno += newlines
+            line_start = consumed + buffer.rfind("\n", 0, pos) + 1
+        consumed += pos
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
 
 
 def read_products(catalog_json: str) -> dict:
     """
-    Read the product catalog from a JSON file.
+    Read the product catalog from a JSON file, one product at a time.
 
     Args:
         catalog_json (str): The path to the JSON file
@@ -26,9 +156,8 @@ def read_products(catalog_json: str) -> dict:
     """
     products_dict = {}
     with open(catalog_json, "r", encoding="utf-8") as file:
-        products = json.load(file)
         # reducir a un diccionario title:price
-        for product in products:
+        for product in iter_json_array(file):
             name = product["title"]
             try:
                 price = float(product["price"])
@@ -46,7 +175,7 @@ def read_products(catalog_json: str) -> dict:
 
 def read_sales(sales_json: str) -> dict:
     """
-    Read sales data from a JSON file.
+    Read sales data from a JSON file, one sale at a time.
 
     Args:
         sales_json (str): The path to the JSON file containing the sales data.
@@ -56,9 +185,8 @@ def read_sales(sales_json: str) -> dict:
     """
     sales_dict = {}
     with open(sales_json, "r", encoding="utf-8") as file:
-        sales = json.load(file)
         # reducir a un diccionario Product:Quantity
-        for sale in sales:
+        for sale in iter_json_array(file):
             product = sale["Product"]
             try:
                 quantity = int(sale["Quantity"])
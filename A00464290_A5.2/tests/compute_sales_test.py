@@ -0,0 +1,112 @@
+"""
+Compute sales test module
+"""
+import io
+import json
+import unittest
+
+from compute_sales import iter_json_array
+
+CHUNK_SIZES = (1, 2, 3, 7, 1 << 16)
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """
+    TestIterJsonArray class Test cases for the iter_json_array function
+    """
+
+    def parse(self, text: str, chunk_size: int) -> list:
+        """
+        Parse the text as a JSON array in chunks of the given size
+        """
+        return list(iter_json_array(io.StringIO(text), chunk_size))
+
+    def test_valid(self):
+        """
+        Test valid arrays against json.loads at every chunk size
+        """
+        documents = [
+            "[]",
+            "  [ ]  \n",
+            "[1]",
+            "[12345, -6.5e-3, 0.25, 1E10]",
+            '[{"title": "a, b]", "price": 10.5}, {"quantity": 3}]',
+            '[ "x\\"]", [1, [2, [3]]], true, false, null ]',
+            '\n[\n  {"Product": "Rustic Breakfast", "Quantity": 1},\n'
+            '  {"Product": "Sandwich Bread", "Quantity": -2}\n]\n',
+        ]
+        for text in documents:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(self.parse(text, chunk_size), json.loads(text))
+
+    def test_numbers_across_chunks(self):
+        """
+        Test that numbers split between chunks are not cut short
+        """
+        text = "[4.125, 1000000, -7e+12]"
+        for chunk_size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(text, chunk_size), [4.125, 1000000, -7e12])
+
+    def test_invalid(self):
+        """
+        Test that malformed arrays and other JSON values raise a
+        JSONDecodeError
+        """
+        documents = [
+            "",
+            "{}",
+            "[",
+            "[1",
+            "[1,",
+            "[1 2]",
+            "[1,]",
+            "[,1]",
+            '["open]',
+            "[1] 2",
+            "[1]]",
+            "[] x",
+            "[]\n\n,",
+        ]
+        for text in documents:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self.parse(text, chunk_size)
+
+    def test_error_positions(self):
+        """
+        Test that errors report the same file positions as json.loads
+        """
+        records = [f'  {{"Product": "p{index}", "Quantity": {index}}}' for index in range(200)]
+        good = "[\n" + ",\n".join(records) + "\n]\n"
+        documents = [
+            "[1 2]",
+            "[1]]",
+            "[tru]",
+            '["a\nb"]',
+            good.replace('"p150"', '"p150" 3'),
+            good.replace('"Quantity": 7}', '"Quantity" 7}'),
+            good.replace(', "Quantity": 199', ' "Quantity": 199'),
+            good + " ,",
+        ]
+        for text in documents:
+            with self.assertRaises(json.JSONDecodeError) as expected:
+                json.loads(text)
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text[-30:], chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError) as raised:
+                        self.parse(text, chunk_size)
+                    self.assertEqual(str(raised.exception), str(expected.exception))
+
+    def test_large_element(self):
+        """
+        Test an element many times larger than the chunk size
+        """
+        text = '[{"Product": "' + "x" * 100000 + '", "Quantity": [' + ", ".join(["1"] * 10000) + "]}, 2]"
+        self.assertEqual(self.parse(text, 7), json.loads(text))
+
+
+if __name__ == "__main__":
+    unittest.main()